@@ -2,7 +2,9 @@
 
 import Link from 'next/link';
 import { useState } from 'react';
-import { API_BASE, getToken } from '../../lib';
+import { API_BASE, apiFetch, getToken } from '../../lib';
+
+const POLL_MAX_MS = 30 * 60 * 1000;
 
 export default function ImportV5() {
   const [file, setFile] = useState<File | null>(null);
@@ -39,7 +41,37 @@ export default function ImportV5() {
       setStatus(`Erro: ${JSON.stringify(data)}`);
       return;
     }
-    setStatus(`OK: ${JSON.stringify(data)}`);
+
+    // a importação roda em background: acompanha o job até terminar
+    const jobId = data?.job_id;
+    if (!jobId) {
+      setStatus(`OK: ${JSON.stringify(data)}`);
+      return;
+    }
+    // a API marca como failed um job parado (ex.: reinício no meio da importação);
+    // o prazo aqui só evita esperar para sempre se nem isso chegar
+    const deadline = Date.now() + POLL_MAX_MS;
+    for (;;) {
+      if (Date.now() > deadline) {
+        setStatus(`Erro: a importação não terminou em ${POLL_MAX_MS / 60000} min (job ${jobId}). Verifique o status mais tarde.`);
+        return;
+      }
+      await new Promise((r) => setTimeout(r, 1000));
+      const job = await apiFetch(`/emoluments/import/jobs/${encodeURIComponent(jobId)}`);
+      if (!job.res.ok) {
+        setStatus(`Erro: ${JSON.stringify(job.data)}`);
+        return;
+      }
+      if (job.data.status === 'done') {
+        setStatus(`OK: ${JSON.stringify(job.data.result)}`);
+        return;
+      }
+      if (job.data.status === 'failed') {
+        setStatus(`Erro: ${job.data.error}`);
+        return;
+      }
+      setStatus(`Importando... (${job.data.status}, ${job.data.progress}%)`);
+    }
   }
 
   return (
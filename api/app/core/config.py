@@ -13,6 +13,16 @@ JWT_SECRET = getenv("JWT_SECRET", "dev-secret")
 JWT_ALG = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", "720"))
 
+# Import jobs run in-process: one with no progress for this long (e.g. the API
+# restarted mid-import) is reported as failed when its status is read
+IMPORT_JOB_STALE_MINUTES = float(os.environ.get("IMPORT_JOB_STALE_MINUTES", "15"))
+
+# How often (seconds) each worker checks the emolument tables generation (0 = every request)
+SNAPSHOT_POLL_SECONDS = float(os.environ.get("SNAPSHOT_POLL_SECONDS", "2"))
+
+# max-age (seconds) sent on public GET calc responses (/calc/*)
+CALC_CACHE_MAX_AGE = int(os.environ.get("CALC_CACHE_MAX_AGE", "60"))
+
 # Seed admin
 SEED_ADMIN_EMAIL = (os.environ.get("SEED_ADMIN_EMAIL", "admin@pratico.local") or "").strip().lower()
 SEED_ADMIN_PASSWORD = (os.environ.get("SEED_ADMIN_PASSWORD", "ChangeMe-Now-123") or "").strip()
@@ -0,0 +1,37 @@
+import hashlib
+
+from fastapi import Request, Response
+
+from app.core.config import CALC_CACHE_MAX_AGE
+
+CALC_CACHE_CONTROL = f"public, max-age={CALC_CACHE_MAX_AGE}"
+
+
+def make_etag(base: str, *parts) -> str:
+    """Strong ETag for a response that depends only on ``base`` (data version) and ``parts``."""
+    raw = "|".join([base, *(repr(p) for p in parts)])
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def cache_headers(etag: str, cache_control: str = CALC_CACHE_CONTROL) -> dict:
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+def not_modified(etag: str, cache_control: str = CALC_CACHE_CONTROL) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, cache_control))
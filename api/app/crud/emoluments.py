@@ -6,6 +6,7 @@ from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
 from app.models.emoluments import EmolumentBracket, EmolumentTable, TableStatus
+from app.services.emolument_snapshot import bump_generation, refresh_snapshot
 
 
 def _uf(x: str) -> str:
@@ -50,8 +51,12 @@ def add_bracket(db: Session, *, table_id: str, range_from: float, range_to: floa
         updated_at=datetime.utcnow(),
     )
     db.add(b)
+    if t.status == TableStatus.active:
+        bump_generation(db)
     db.commit()
     db.refresh(b)
+    if t.status == TableStatus.active:
+        refresh_snapshot(db)
     return b
 
 
@@ -69,8 +74,10 @@ def activate_table(db: Session, *, table_id: str) -> EmolumentTable:
 
     t.status = TableStatus.active
     db.add(t)
+    bump_generation(db)
     db.commit()
     db.refresh(t)
+    refresh_snapshot(db)
     return t
 
 
@@ -78,8 +85,12 @@ def archive_table(db: Session, *, table_id: str) -> EmolumentTable:
     t = db.query(EmolumentTable).filter(EmolumentTable.id == table_id).first()
     if not t:
         raise HTTPException(404, "table_not_found")
+    was_active = t.status == TableStatus.active
     t.status = TableStatus.archived
     db.add(t)
+    if was_active:
+        bump_generation(db)
     db.commit()
     db.refresh(t)
+    refresh_snapshot(db)
     return t
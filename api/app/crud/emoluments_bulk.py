@@ -0,0 +1,69 @@
+"""Bulk writers for ``emolument_tables`` and ``emolument_brackets``.
+
+PostgreSQL with psycopg (v3) goes through ``COPY ... FROM STDIN`` on the
+session's own connection, so rows stay in the caller's transaction. Other
+drivers (SQLite in tests) use batched executemany INSERTs. Nothing here
+commits.
+"""
+
+from __future__ import annotations
+
+import enum
+from typing import Iterable, List, Mapping, Sequence
+
+from sqlalchemy import Table, insert
+from sqlalchemy.orm import Session
+
+from app.models.emoluments import EmolumentBracket, EmolumentTable
+
+BATCH_SIZE = 5000
+
+
+def _uses_copy(db: Session) -> bool:
+    dialect = db.get_bind().dialect
+    return dialect.name == "postgresql" and dialect.driver == "psycopg"
+
+
+def _copy_value(v):
+    # SQLAlchemy's Enum() stores member names
+    if isinstance(v, enum.Enum):
+        return v.name
+    return v
+
+
+def _copy_rows(db: Session, table: Table, columns: Sequence[str], rows: Iterable[Mapping]) -> int:
+    raw = db.connection().connection.driver_connection
+    cols = ", ".join(f'"{c}"' for c in columns)
+    n = 0
+    with raw.cursor() as cur:
+        with cur.copy(f'COPY "{table.name}" ({cols}) FROM STDIN') as copy:
+            for row in rows:
+                copy.write_row([_copy_value(row[c]) for c in columns])
+                n += 1
+    return n
+
+
+def _insert_batches(db: Session, table: Table, rows: List[Mapping], batch_size: int) -> int:
+    for i in range(0, len(rows), batch_size):
+        db.execute(insert(table), rows[i : i + batch_size])
+    return len(rows)
+
+
+def bulk_write(db: Session, table: Table, rows: Sequence[Mapping], batch_size: int = BATCH_SIZE) -> int:
+    """Insert ``rows`` (dicts with the same keys, all values filled) into ``table``."""
+    rows = list(rows)
+    if not rows:
+        return 0
+    # make sure pending ORM changes (e.g. archived tables) hit the DB first
+    db.flush()
+    if _uses_copy(db):
+        return _copy_rows(db, table, list(rows[0].keys()), rows)
+    return _insert_batches(db, table, rows, batch_size)
+
+
+def bulk_insert_tables(db: Session, rows: Sequence[Mapping], batch_size: int = BATCH_SIZE) -> int:
+    return bulk_write(db, EmolumentTable.__table__, rows, batch_size)
+
+
+def bulk_insert_brackets(db: Session, rows: Sequence[Mapping], batch_size: int = BATCH_SIZE) -> int:
+    return bulk_write(db, EmolumentBracket.__table__, rows, batch_size)
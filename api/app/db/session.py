@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import DATABASE_URL
@@ -16,9 +18,33 @@ def _normalize_db_url(url: str) -> str:
     return url
 
 
+# Drivers create_async_engine accepts, and the one each backend is switched to
+# when DATABASE_URL names a sync driver (postgresql+psycopg2, sqlite+pysqlite, ...)
+_ASYNC_DRIVERS = {"psycopg", "psycopg_async", "asyncpg", "aiosqlite"}
+_ASYNC_DRIVER_FOR = {"postgresql": "psycopg", "sqlite": "aiosqlite"}
+
+
+def _async_db_url(url: str) -> str:
+    url = _normalize_db_url(url)
+    u = make_url(url)
+    if u.get_driver_name() in _ASYNC_DRIVERS:
+        return url
+    driver = _ASYNC_DRIVER_FOR.get(u.get_backend_name())
+    if driver is None:
+        raise RuntimeError(
+            f"DATABASE_URL driver '{u.drivername}' has no async counterpart here; "
+            "use postgresql+psycopg:// or sqlite://"
+        )
+    return u.set(drivername=f"{u.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
 engine = create_engine(_normalize_db_url(DATABASE_URL), pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for read paths served from async handlers (the event loop must not block on DB I/O)
+async_engine = create_async_engine(_async_db_url(DATABASE_URL), pool_pre_ping=True)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 def get_db():
     db = SessionLocal()
@@ -26,3 +52,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,10 +1,10 @@
 import logging
 import sys
 
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.db.session import engine, SessionLocal
+from app.db.session import async_engine, engine, SessionLocal
 from app.db.base import Base
 from app.routers import auth, users, emoluments
 from app.routers import emoluments_calc
@@ -16,11 +16,10 @@ from app.routers import webhooks_evolution
 from app.routers import module3_validate
 from app.routers import corretor
 from app.routers import modelos
+from app.services.landing_segments import landing_segments
 from app.services.seed import ensure_admin
+from app.services.emolument_snapshot import ensure_generation_row, get_snapshot_async, refresh_snapshot
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from app.db.session import get_db
-from app.models.emoluments import EmolumentBracket, EmolumentTable, TableStatus
 from app.models.validation import ContactValidation
 from app.models.corretor import Corretor
 from app.models.modelos_documentos import ModeloDocumento, VersaoModelo, Cartorio
@@ -56,6 +55,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 
@@ -68,10 +68,18 @@ def on_startup():
         result = ensure_admin(db)
         # log in Render runtime logs
         print(f"[seed] {result}")
+        ensure_generation_row(db)
+        snap = refresh_snapshot(db)
+        print(f"[snapshot] {len(snap.tables)} active tables loaded")
     finally:
         db.close()
 
 
+@app.on_event("shutdown")
+async def on_shutdown():
+    await async_engine.dispose()
+
+
 @app.get("/health")
 def health():
     return {"ok": True}
@@ -93,70 +101,27 @@ class CalcularResponse(BaseModel):
     comissao_corretor: float
 
 
-def get_emolumento_for_value(uf: str, property_value: float, db: Session):
-    """Busca o emolumento para um valor específico em uma UF."""
-    t = (
-        db.query(EmolumentTable)
-        .filter(EmolumentTable.uf == uf, EmolumentTable.status == TableStatus.active)
-        .order_by(EmolumentTable.year.desc(), EmolumentTable.created_at.desc())
-        .first()
-    )
-    if not t:
-        return None
-
-    bs = (
-        db.query(EmolumentBracket)
-        .filter(EmolumentBracket.table_id == t.id, EmolumentBracket.active == True)
-        .order_by(EmolumentBracket.range_from.asc())
-        .all()
-    )
-    for b in bs:
-        if float(b.range_from) <= property_value <= float(b.range_to):
-            return float(b.amount)
-
-    # fallback: above last range
-    if bs and property_value > float(bs[-1].range_to):
-        return float(bs[-1].amount)
-
-    return None
-
-
 @app.post("/calcular", response_model=CalcularResponse)
-def calcular_landing(request: CalcularRequest, db: Session = Depends(get_db)):
+async def calcular_landing(request: CalcularRequest):
     """Endpoint simplificado para calculadora da landing page."""
     uf = request.uf.strip().upper()
     valor = request.valor
+    snap = await get_snapshot_async()
 
-    # Obtém emolumento local
-    custo_local = get_emolumento_for_value(uf, valor, db)
-    if custo_local is None:
+    # segmentos pré-calculados da UF de origem: custo local, menor custo entre UFs e economia
+    seg = landing_segments(snap, uf)
+    r = seg.quote(valor) if seg else None
+    if r is None:
         raise HTTPException(404, "Tabela não encontrada para a UF informada")
 
-    # Busca o menor emolumento entre todas as UFs
-    tables = (
-        db.query(EmolumentTable)
-        .filter(EmolumentTable.status == TableStatus.active)
-        .all()
-    )
-
-    menor_emolumento = custo_local
-    for t in tables:
-        emol = get_emolumento_for_value(t.uf, valor, db)
-        if emol and emol < menor_emolumento:
-            menor_emolumento = emol
-
-    economia = round(custo_local - menor_emolumento, 2)
-    economia_pct = round((economia / custo_local) * 100, 2) if custo_local else 0
-    comissao_corretor = round(economia * 0.35, 2)
-
     return CalcularResponse(
         uf=uf,
         valor=valor,
-        custo_local=custo_local,
-        custo_pratico=menor_emolumento,
-        economia=economia,
-        economia_pct=economia_pct,
-        comissao_corretor=comissao_corretor,
+        custo_local=r.custo_local,
+        custo_pratico=r.custo_pratico,
+        economia=r.economia,
+        economia_pct=r.economia_pct,
+        comissao_corretor=r.comissao_corretor,
     )
 
 
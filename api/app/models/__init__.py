@@ -1,5 +1,5 @@
 from app.models.user import User, UserRole
-from app.models.emoluments import EmolumentTable, EmolumentBracket, TableStatus
+from app.models.emoluments import EmolumentTable, EmolumentBracket, EmolumentImportJob, EmolumentTablesGeneration, ImportJobStatus, TableStatus
 from app.models.leads import Lead
 from app.models.webhook_event import WebhookEvent
 from app.models.orders import Order
@@ -2,7 +2,7 @@ import enum
 import uuid
 from datetime import datetime, date
 
-from sqlalchemy import Boolean, Column, Date, DateTime, Enum, ForeignKey, Integer, Numeric, String, Text
+from sqlalchemy import JSON, Boolean, Column, Date, DateTime, Enum, ForeignKey, Integer, Numeric, String, Text
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -45,3 +45,41 @@ class EmolumentBracket(Base):
     updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
     table = relationship("EmolumentTable", back_populates="brackets")
+
+
+class ImportJobStatus(str, enum.Enum):
+    queued = "queued"
+    parsing = "parsing"
+    validating = "validating"
+    writing = "writing"
+    done = "done"
+    failed = "failed"
+
+
+class EmolumentImportJob(Base):
+    __tablename__ = "emolument_import_jobs"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    year = Column(Integer, nullable=False)
+    source_name = Column(Text, nullable=True)
+    source_hash = Column(Text, nullable=True)
+    status = Column(Enum(ImportJobStatus), nullable=False, default=ImportJobStatus.queued)
+    progress = Column(Integer, nullable=False, default=0)  # 0-100
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_by = Column(String, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class EmolumentTablesGeneration(Base):
+    """Single-row counter bumped whenever active tables/brackets change.
+
+    API workers poll it to know when their in-process snapshot is stale.
+    """
+
+    __tablename__ = "emolument_tables_generation"
+
+    id = Column(Integer, primary_key=True, default=1)
+    generation = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
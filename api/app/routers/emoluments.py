@@ -1,28 +1,31 @@
 from __future__ import annotations
 
-from datetime import date
 from typing import Optional
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, UploadFile
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
-from app.models.emoluments import EmolumentBracket, EmolumentTable, TableStatus
+from app.db.session import get_async_db, get_db
+from app.models.emoluments import EmolumentBracket, EmolumentImportJob, EmolumentTable
 from app.models.user import User
 from app.routers.deps import get_current_user
-from app.services.xlsx_v5_parser import parse_v5_xlsx
+from app.services.emolument_import import create_job, expire_stale_job, job_to_dict, run_import_job
+from app.services.emolument_snapshot import bump_generation, refresh_snapshot
 
 router = APIRouter(prefix="/emoluments", tags=["emoluments"])
 
 
 @router.get("/tables")
-def list_tables(uf: Optional[str] = None, status: Optional[str] = None, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    q = db.query(EmolumentTable)
+async def list_tables(uf: Optional[str] = None, status: Optional[str] = None, db: AsyncSession = Depends(get_async_db), user: User = Depends(get_current_user)):
+    q = select(EmolumentTable)
     if uf:
-        q = q.filter(EmolumentTable.uf == uf.upper())
+        q = q.where(EmolumentTable.uf == uf.upper())
     if status:
-        q = q.filter(EmolumentTable.status == status)
+        q = q.where(EmolumentTable.status == status)
     q = q.order_by(EmolumentTable.uf.asc(), EmolumentTable.year.desc(), EmolumentTable.created_at.desc())
+    rows = (await db.scalars(q.limit(500))).all()
     return [
         {
             "id": t.id,
@@ -33,7 +36,7 @@ def list_tables(uf: Optional[str] = None, status: Optional[str] = None, db: Sess
             "source_hash": t.source_hash,
             "created_at": t.created_at,
         }
-        for t in q.limit(500).all()
+        for t in rows
     ]
 
 
@@ -64,52 +67,32 @@ def update_bracket(bracket_id: str, payload: dict, db: Session = Depends(get_db)
         if k in payload:
             setattr(b, k, payload[k])
     db.add(b)
+    bump_generation(db)
     db.commit()
+    refresh_snapshot(db)
     return {"ok": True}
 
 
-@router.post("/import/v5")
+@router.post("/import/v5", status_code=202)
 def import_v5(
+    background_tasks: BackgroundTasks,
     year: int = 2026,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
+    """Agenda a importação da planilha v5; acompanhe em GET /emoluments/import/jobs/{job_id}."""
     if not file.filename.lower().endswith(".xlsx"):
         raise HTTPException(400, "file_must_be_xlsx")
     content = file.file.read()
-    file_hash, by_uf = parse_v5_xlsx(content)
-    if len(by_uf) < 27:
-        # Aceita menos se a planilha mudar, mas alerta
-        raise HTTPException(400, f"ufs_parsed={len(by_uf)} (expected 27)")
+    job = create_job(db, year=year, source_name=file.filename, created_by=user.id)
+    background_tasks.add_task(run_import_job, job.id, content)
+    return {"ok": True, "job_id": job.id, "status": job.status, "status_url": f"/emoluments/import/jobs/{job.id}"}
 
-    # archive previous active tables for that year
-    db.query(EmolumentTable).filter(EmolumentTable.year == year, EmolumentTable.status == TableStatus.active).update({EmolumentTable.status: TableStatus.archived})
 
-    created = 0
-    for uf, brackets in by_uf.items():
-        t = EmolumentTable(
-            uf=uf,
-            year=year,
-            valid_from=date(year, 1, 1),
-            valid_to=None,
-            source_name=file.filename,
-            source_hash=file_hash,
-            status=TableStatus.active,
-            created_by=user.id,
-        )
-        for i, br in enumerate(brackets):
-            t.brackets.append(
-                EmolumentBracket(
-                    range_from=br.range_from,
-                    range_to=br.range_to,
-                    amount=br.amount,
-                    sort_order=i,
-                    active=True,
-                )
-            )
-        db.add(t)
-        created += 1
-
-    db.commit()
-    return {"ok": True, "tables_created": created, "source_hash": file_hash}
+@router.get("/import/jobs/{job_id}")
+def import_job_status(job_id: str, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    job = db.query(EmolumentImportJob).filter(EmolumentImportJob.id == job_id).first()
+    if not job:
+        raise HTTPException(404, "job_not_found")
+    return job_to_dict(expire_stale_job(db, job))
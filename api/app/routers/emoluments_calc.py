@@ -1,11 +1,10 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
 
-from app.db.session import get_db
-from app.models.emoluments import EmolumentBracket, EmolumentTable, TableStatus
+from app.core.http_cache import cache_headers, etag_matches, make_etag, not_modified
+from app.services.emolument_snapshot import ActiveTablesSnapshot, get_snapshot_async
 
 router = APIRouter(prefix="/calc", tags=["calc"])
 
@@ -25,97 +24,36 @@ class CalcularResponse(BaseModel):
     comissao_corretor: float
 
 
-@router.get("/deed")
-def calc_deed(uf: str, property_value: float, db: Session = Depends(get_db)):
+def _deed(snap: ActiveTablesSnapshot, uf: str, property_value: float) -> dict:
     uf = uf.strip().upper()
-    t = (
-        db.query(EmolumentTable)
-        .filter(EmolumentTable.uf == uf, EmolumentTable.status == TableStatus.active)
-        .order_by(EmolumentTable.year.desc(), EmolumentTable.created_at.desc())
-        .first()
-    )
+    t = snap.table_for(uf)
     if not t:
         raise HTTPException(404, "active_table_not_found")
 
-    bs = (
-        db.query(EmolumentBracket)
-        .filter(EmolumentBracket.table_id == t.id, EmolumentBracket.active == True)
-        .order_by(EmolumentBracket.range_from.asc())
-        .all()
-    )
-    for b in bs:
-        if float(b.range_from) <= property_value <= float(b.range_to):
-            return {
-                "uf": uf,
-                "year": t.year,
-                "property_value": property_value,
-                "emolumento": float(b.amount),
-                "faixa": {"de": float(b.range_from), "ate": float(b.range_to)},
-                "table_id": t.id,
-            }
-
-    # fallback: above last range
-    if bs and property_value > float(bs[-1].range_to):
-        b = bs[-1]
-        return {
-            "uf": uf,
-            "year": t.year,
-            "property_value": property_value,
-            "emolumento": float(b.amount),
-            "faixa": {"de": float(b.range_from), "ate": float(b.range_to)},
-            "table_id": t.id,
-            "observacao": "Valor acima do teto da tabela; usando última faixa.",
-        }
-
-    raise HTTPException(400, "no_bracket_for_value")
+    q = t.quote(property_value)
+    if q is None:
+        raise HTTPException(400, "no_bracket_for_value")
+    return {
+        "uf": uf,
+        "year": t.year,
+        "property_value": property_value,
+        "emolumento": q["emolumento"],
+        "faixa": q["faixa"],
+        "table_id": t.id,
+        **({"observacao": q["observacao"]} if "observacao" in q else {}),
+    }
 
 
-@router.get("/deed-economy")
-def calc_deed_economy(uf: str, property_value: float, db: Session = Depends(get_db)):
-    """Retorna economia vs menor emolumento entre UFs para o mesmo valor."""
-    base = calc_deed(uf=uf, property_value=property_value, db=db)
+def _deed_economy(snap: ActiveTablesSnapshot, uf: str, property_value: float) -> dict:
+    base = _deed(snap, uf, property_value)
 
     # find min across all active tables
-    from app.models.emoluments import EmolumentTable, EmolumentBracket, TableStatus
-
-    tables = (
-        db.query(EmolumentTable)
-        .filter(EmolumentTable.status == TableStatus.active)
-        .order_by(EmolumentTable.uf.asc())
-        .all()
-    )
-
     best = None
-    for t in tables:
-        bs = (
-            db.query(EmolumentBracket)
-            .filter(EmolumentBracket.table_id == t.id, EmolumentBracket.active == True)
-            .order_by(EmolumentBracket.range_from.asc())
-            .all()
-        )
-        for b in bs:
-            if float(b.range_from) <= property_value <= float(b.range_to):
-                cand = {
-                    "uf": t.uf,
-                    "emolumento": float(b.amount),
-                    "faixa": {"de": float(b.range_from), "ate": float(b.range_to)},
-                    "table_id": t.id,
-                }
-                if best is None or cand["emolumento"] < best["emolumento"]:
-                    best = cand
-                break
-        else:
-            # fallback: above last range
-            if bs and property_value > float(bs[-1].range_to):
-                cand = {
-                    "uf": t.uf,
-                    "emolumento": float(bs[-1].amount),
-                    "faixa": {"de": float(bs[-1].range_from), "ate": float(bs[-1].range_to)},
-                    "table_id": t.id,
-                    "observacao": "Valor acima do teto da tabela; usando última faixa.",
-                }
-                if best is None or cand["emolumento"] < best["emolumento"]:
-                    best = cand
+    for t, q in snap.quotes(property_value):
+        if best is None or q["emolumento"] < best["emolumento"]:
+            best = {"uf": t.uf, "emolumento": q["emolumento"], "faixa": q["faixa"], "table_id": t.id}
+            if "observacao" in q:
+                best["observacao"] = q["observacao"]
 
     if not best:
         raise HTTPException(500, "no_active_tables")
@@ -130,5 +68,31 @@ def calc_deed_economy(uf: str, property_value: float, db: Session = Depends(get_
     }
 
 
+@router.get("/deed")
+async def calc_deed(uf: str, property_value: float, request: Request, response: Response):
+    """Served from the in-process snapshot of active tables (no DB round-trip)."""
+    snap = await get_snapshot_async()
+    # body first: an unknown UF is 404 even for If-None-Match: *
+    body = _deed(snap, uf, property_value)
+    etag = make_etag(snap.etag_base, "deed", uf.strip().upper(), property_value)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(cache_headers(etag))
+    return body
+
+
+@router.get("/deed-economy")
+async def calc_deed_economy(uf: str, property_value: float, request: Request, response: Response):
+    """Retorna economia vs menor emolumento entre UFs para o mesmo valor."""
+    snap = await get_snapshot_async()
+    # body first: an unknown UF is 404 even for If-None-Match: *
+    body = _deed_economy(snap, uf, property_value)
+    etag = make_etag(snap.etag_base, "deed-economy", uf.strip().upper(), property_value)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    response.headers.update(cache_headers(etag))
+    return body
+
+
 # Nota: O endpoint POST /calcular foi movido para main.py (raiz da API)
 # para facilitar o CORS com a landing page.
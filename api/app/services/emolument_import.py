@@ -0,0 +1,274 @@
+"""Import job pipeline for the v5 spreadsheet (parse -> validate -> write).
+
+The HTTP endpoint only records a job and schedules ``run_import_job`` as a
+background task; progress and the final result live in
+``emolument_import_jobs`` so any API instance can answer status polls.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List
+
+from sqlalchemy.orm import Session
+
+from app.core.config import IMPORT_JOB_STALE_MINUTES
+from app.crud.emoluments_bulk import bulk_insert_brackets, bulk_insert_tables
+from app.db.session import SessionLocal
+from app.models.emoluments import EmolumentBracket, EmolumentImportJob, EmolumentTable, ImportJobStatus, TableStatus
+from app.services.emolument_snapshot import bump_generation, refresh_snapshot
+from app.services.xlsx_v5_parser import Bracket, parse_v5_xlsx
+
+logger = logging.getLogger(__name__)
+
+EXPECTED_UFS = 27
+
+
+class ImportValidationError(ValueError):
+    pass
+
+
+def create_job(db: Session, *, year: int, source_name: str | None, created_by: str | None) -> EmolumentImportJob:
+    job = EmolumentImportJob(
+        year=year,
+        source_name=source_name,
+        status=ImportJobStatus.queued,
+        progress=0,
+        created_by=created_by,
+        updated_at=datetime.utcnow(),
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def job_to_dict(job: EmolumentImportJob) -> dict:
+    return {
+        "id": job.id,
+        "year": job.year,
+        "status": job.status,
+        "progress": job.progress,
+        "source_name": job.source_name,
+        "source_hash": job.source_hash,
+        "result": job.result,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+    }
+
+
+def expire_stale_job(db: Session, job: EmolumentImportJob) -> EmolumentImportJob:
+    """Mark a running job as failed if it stopped making progress.
+
+    Jobs run as in-process background tasks, so a restart or deploy
+    mid-import leaves them in a running stage forever. The update is
+    conditional on the row being unchanged, so a job that is still alive
+    and just moved to its next stage is left alone.
+    """
+    if job.status in (ImportJobStatus.done, ImportJobStatus.failed):
+        return job
+    if job.updated_at > datetime.utcnow() - timedelta(minutes=IMPORT_JOB_STALE_MINUTES):
+        return job
+    stage, last = job.status, job.updated_at
+    n = (
+        db.query(EmolumentImportJob)
+        .filter(
+            EmolumentImportJob.id == job.id,
+            EmolumentImportJob.status == stage,
+            EmolumentImportJob.updated_at == last,
+        )
+        .update(
+            {
+                EmolumentImportJob.status: ImportJobStatus.failed,
+                EmolumentImportJob.error: f"job_stale: no progress since {last.isoformat()} (stage {stage.value})",
+                EmolumentImportJob.updated_at: datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+    )
+    db.commit()
+    if n:
+        logger.warning("[import-v5] job %s stale in %s; marked failed", job.id, stage.value)
+    db.refresh(job)
+    return job
+
+
+def validate_v5_brackets(by_uf: Dict[str, List[Bracket]]) -> None:
+    """Reject spreadsheets the calculators cannot use (missing UFs, bad ranges)."""
+    if len(by_uf) < EXPECTED_UFS:
+        # Aceita menos se a planilha mudar, mas alerta
+        raise ImportValidationError(f"ufs_parsed={len(by_uf)} (expected {EXPECTED_UFS})")
+    for uf, brackets in by_uf.items():
+        prev = None
+        for br in brackets:
+            if br.range_from > br.range_to:
+                raise ImportValidationError(f"{uf}: range_from_gt_range_to ({br.range_from} > {br.range_to})")
+            if br.amount < 0:
+                raise ImportValidationError(f"{uf}: negative_amount ({br.amount})")
+            if prev is not None and br.range_from <= prev.range_to:
+                raise ImportValidationError(f"{uf}: overlapping_brackets ({prev.range_to} >= {br.range_from})")
+            prev = br
+
+
+def brackets_content_hash(brackets: Iterable) -> str:
+    """Hash of a bracket list as stored (2 decimals), comparable between parsed and DB brackets."""
+    h = hashlib.sha256()
+    for b in sorted(brackets, key=lambda b: (b.range_from, b.range_to)):
+        h.update(f"{b.range_from:.2f}|{b.range_to:.2f}|{b.amount:.2f}\n".encode())
+    return h.hexdigest()
+
+
+def active_content_hashes(db: Session, *, year: int) -> Dict[str, tuple[str, str]]:
+    """{UF: (table_id, content_hash)} for the latest active table of each UF in ``year``."""
+    rows = (
+        db.query(EmolumentTable.id, EmolumentTable.uf, EmolumentBracket)
+        .outerjoin(
+            EmolumentBracket,
+            (EmolumentBracket.table_id == EmolumentTable.id) & (EmolumentBracket.active == True),
+        )
+        .filter(EmolumentTable.year == year, EmolumentTable.status == TableStatus.active)
+        .order_by(EmolumentTable.uf.asc(), EmolumentTable.created_at.desc())
+        .all()
+    )
+    latest: Dict[str, str] = {}
+    brackets: Dict[str, list] = {}
+    for table_id, uf, br in rows:
+        if latest.setdefault(uf, table_id) != table_id:
+            continue
+        if br is not None:
+            brackets.setdefault(table_id, []).append(br)
+    return {uf: (tid, brackets_content_hash(brackets.get(tid, []))) for uf, tid in latest.items()}
+
+
+def write_v5_tables(
+    db: Session,
+    *,
+    year: int,
+    by_uf: Dict[str, List[Bracket]],
+    source_name: str | None,
+    source_hash: str,
+    created_by: str | None,
+) -> dict:
+    """Write new table versions only for UFs whose brackets changed (no commit).
+
+    Each UF's parsed brackets are hashed and compared with its active table
+    for ``year``: identical UFs keep their table (and id); changed or new
+    UFs get their active table archived and a new active one. Rows go
+    through the bulk writers (COPY on PostgreSQL). Returns a diff summary.
+    """
+    current = active_content_hashes(db, year=year)
+    changed: List[str] = []
+    unchanged: List[str] = []
+    for uf in sorted(by_uf):
+        if uf in current and current[uf][1] == brackets_content_hash(by_uf[uf]):
+            unchanged.append(uf)
+        else:
+            changed.append(uf)
+
+    if changed:
+        # archive previous active tables of the changed UFs for that year
+        db.query(EmolumentTable).filter(
+            EmolumentTable.year == year,
+            EmolumentTable.status == TableStatus.active,
+            EmolumentTable.uf.in_(changed),
+        ).update({EmolumentTable.status: TableStatus.archived}, synchronize_session=False)
+
+    now = datetime.utcnow()
+    table_rows = []
+    bracket_rows = []
+    for uf in changed:
+        brackets = by_uf[uf]
+        table_id = str(uuid.uuid4())
+        table_rows.append(
+            {
+                "id": table_id,
+                "uf": uf,
+                "year": year,
+                "valid_from": date(year, 1, 1),
+                "valid_to": None,
+                "source_name": source_name,
+                "source_hash": source_hash,
+                "status": TableStatus.active,
+                "created_by": created_by,
+                "created_at": now,
+            }
+        )
+        for i, br in enumerate(brackets):
+            bracket_rows.append(
+                {
+                    "id": str(uuid.uuid4()),
+                    "table_id": table_id,
+                    "range_from": br.range_from,
+                    "range_to": br.range_to,
+                    "amount": br.amount,
+                    "sort_order": i,
+                    "active": True,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+
+    bulk_insert_tables(db, table_rows)
+    bulk_insert_brackets(db, bracket_rows)
+    if changed:
+        bump_generation(db)
+    return {
+        "tables_created": len(table_rows),
+        "brackets_created": len(bracket_rows),
+        "created": [uf for uf in changed if uf not in current],
+        "updated": [uf for uf in changed if uf in current],
+        "unchanged": unchanged,
+        "not_in_file": sorted(set(current) - set(by_uf)),
+    }
+
+
+def _set_stage(db: Session, job: EmolumentImportJob, status: ImportJobStatus, progress: int) -> None:
+    job.status = status
+    job.progress = progress
+    job.updated_at = datetime.utcnow()
+    db.add(job)
+    db.commit()
+
+
+def run_import_job(job_id: str, content: bytes) -> None:
+    """Background task: runs the three stages and records the outcome on the job."""
+    db = SessionLocal()
+    try:
+        job = db.query(EmolumentImportJob).filter(EmolumentImportJob.id == job_id).first()
+        if not job:
+            logger.error("[import-v5] job %s not found", job_id)
+            return
+        try:
+            _set_stage(db, job, ImportJobStatus.parsing, 10)
+            file_hash, by_uf = parse_v5_xlsx(content)
+            job.source_hash = file_hash
+
+            _set_stage(db, job, ImportJobStatus.validating, 50)
+            validate_v5_brackets(by_uf)
+
+            _set_stage(db, job, ImportJobStatus.writing, 60)
+            diff = write_v5_tables(
+                db,
+                year=job.year,
+                by_uf=by_uf,
+                source_name=job.source_name,
+                source_hash=file_hash,
+                created_by=job.created_by,
+            )
+            job.result = {**diff, "source_hash": file_hash}
+            # tables, brackets and the job status land in the same commit
+            _set_stage(db, job, ImportJobStatus.done, 100)
+            refresh_snapshot(db)
+        except Exception as e:
+            logger.exception("[import-v5] job %s failed", job_id)
+            db.rollback()
+            job = db.query(EmolumentImportJob).filter(EmolumentImportJob.id == job_id).first()
+            if job:
+                job.error = str(e)
+                _set_stage(db, job, ImportJobStatus.failed, job.progress or 0)
+    finally:
+        db.close()
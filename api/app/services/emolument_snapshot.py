@@ -0,0 +1,291 @@
+"""In-process compiled snapshot of the active emolument tables.
+
+All active tables and their active brackets are loaded with two queries and
+compiled into sorted float arrays, so the public calc endpoints
+answer with a bisect instead of hitting the database. The snapshot is
+immutable; ``refresh_snapshot`` builds a new one and swaps the module-level
+reference, so readers always see either the old or the new tables.
+
+Coherence across workers/instances: every change to active tables bumps
+the single-row counter in ``emolument_tables_generation`` (created at
+startup by ``ensure_generation_row``) inside the same transaction
+(``bump_generation``). Each worker re-reads that counter at
+most every ``SNAPSHOT_POLL_SECONDS`` (one indexed SELECT) and reloads its
+snapshot when it moved. This is plain polling, so it works on SQLite too.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import SNAPSHOT_POLL_SECONDS
+from app.db.session import AsyncSessionLocal, SessionLocal
+from app.models.emoluments import EmolumentBracket, EmolumentTable, EmolumentTablesGeneration, TableStatus
+
+logger = logging.getLogger(__name__)
+
+ABOVE_CEILING_NOTE = "Valor acima do teto da tabela; usando última faixa."
+
+
+@dataclass(frozen=True)
+class CompiledTable:
+    id: str
+    uf: str
+    year: int
+    created_at: Optional[datetime]
+    source_hash: Optional[str]
+    # brackets ordered by range_from, as float(Numeric) like the ORM path compared them
+    range_from: array
+    range_to: array
+    amount: array
+    # False when brackets overlap: lookup falls back to a first-match scan
+    disjoint: bool = True
+
+    def __len__(self) -> int:
+        return len(self.range_from)
+
+    def lookup(self, value: float) -> Tuple[int, bool]:
+        """(bracket index, above_ceiling); index -1 when no bracket covers the value."""
+        n = len(self.range_from)
+        if not n:
+            return -1, False
+        if self.disjoint:
+            i = bisect_right(self.range_from, value) - 1
+            if i >= 0 and value <= self.range_to[i]:
+                return i, False
+        else:
+            for i in range(n):
+                if self.range_from[i] <= value <= self.range_to[i]:
+                    return i, False
+        # fallback: above last range
+        if value > self.range_to[n - 1]:
+            return n - 1, True
+        return -1, False
+
+    def quote(self, property_value: float) -> Optional[dict]:
+        """Bracket for ``property_value`` as {emolumento, faixa[, observacao]}, or None."""
+        i, above = self.lookup(property_value)
+        if i < 0:
+            return None
+        out = {
+            "emolumento": self.amount[i],
+            "faixa": {"de": self.range_from[i], "ate": self.range_to[i]},
+        }
+        if above:
+            out["observacao"] = ABOVE_CEILING_NOTE
+        return out
+
+
+@dataclass(frozen=True)
+class ActiveTablesSnapshot:
+    # every active table (a UF may have more than one, e.g. different years)
+    tables: Tuple[CompiledTable, ...]
+    # latest active table per UF (year desc, created_at desc), as /calc/deed picks it
+    by_uf: Dict[str, CompiledTable]
+    # value of emolument_tables_generation when the snapshot was read
+    generation: int = 0
+    # hash of generation + active table ids/source hashes; base for HTTP ETags
+    etag_base: str = ""
+    loaded_at: float = field(default_factory=time.time)
+    # structures derived from this snapshot (e.g. landing segments), built on demand
+    derived: dict = field(default_factory=dict, compare=False, repr=False)
+
+    def table_for(self, uf: str) -> Optional[CompiledTable]:
+        return self.by_uf.get(uf)
+
+    def quotes(self, property_value: float, *, latest_only: bool = False) -> Iterator[Tuple[CompiledTable, dict]]:
+        """(table, quote) for every active table covering the value, in UF order."""
+        tables = self.by_uf.values() if latest_only else self.tables
+        for t in tables:
+            q = t.quote(property_value)
+            if q is not None:
+                yield t, q
+
+
+def read_generation(db: Session) -> int:
+    g = db.query(EmolumentTablesGeneration.generation).filter(EmolumentTablesGeneration.id == 1).scalar()
+    return g or 0
+
+
+def ensure_generation_row(db: Session) -> None:
+    """Create the counter row if missing (startup, next to ``create_all``).
+
+    Done once here so ``bump_generation`` is a plain UPDATE: two concurrent
+    first bumps inserting id=1 would fail one of the admin writes.
+    """
+    if db.query(EmolumentTablesGeneration.id).filter(EmolumentTablesGeneration.id == 1).first() is not None:
+        return
+    db.add(EmolumentTablesGeneration(id=1, generation=0, updated_at=datetime.utcnow()))
+    try:
+        db.commit()
+    except IntegrityError:
+        # another worker starting at the same time created it first
+        db.rollback()
+
+
+def bump_generation(db: Session) -> None:
+    """Mark active tables as changed (no commit: goes out with the caller's change)."""
+    db.query(EmolumentTablesGeneration).filter(EmolumentTablesGeneration.id == 1).update(
+        {
+            EmolumentTablesGeneration.generation: EmolumentTablesGeneration.generation + 1,
+            EmolumentTablesGeneration.updated_at: datetime.utcnow(),
+        },
+        synchronize_session=False,
+    )
+
+
+def load_snapshot(db: Session) -> ActiveTablesSnapshot:
+    # read the counter first: a change committed while we load bumps it past
+    # this value, so the next poll reloads
+    generation = read_generation(db)
+    tables = (
+        db.query(EmolumentTable)
+        .filter(EmolumentTable.status == TableStatus.active)
+        .order_by(EmolumentTable.uf.asc(), EmolumentTable.year.desc(), EmolumentTable.created_at.desc())
+        .all()
+    )
+    rows = (
+        db.query(EmolumentBracket.table_id, EmolumentBracket.range_from, EmolumentBracket.range_to, EmolumentBracket.amount)
+        .join(EmolumentTable, EmolumentTable.id == EmolumentBracket.table_id)
+        .filter(EmolumentTable.status == TableStatus.active, EmolumentBracket.active == True)
+        .order_by(EmolumentBracket.table_id.asc(), EmolumentBracket.range_from.asc())
+        .all()
+    )
+    brackets: Dict[str, list] = {}
+    for table_id, range_from, range_to, amount in rows:
+        brackets.setdefault(table_id, []).append((float(range_from), float(range_to), float(amount)))
+
+    compiled = []
+    by_uf: Dict[str, CompiledTable] = {}
+    for t in tables:
+        bs = brackets.get(t.id, [])
+        disjoint = all(bs[i + 1][0] > bs[i][1] for i in range(len(bs) - 1))
+        ct = CompiledTable(
+            id=t.id,
+            uf=t.uf,
+            year=t.year,
+            created_at=t.created_at,
+            source_hash=t.source_hash,
+            range_from=array("d", (b[0] for b in bs)),
+            range_to=array("d", (b[1] for b in bs)),
+            amount=array("d", (b[2] for b in bs)),
+            disjoint=disjoint,
+        )
+        compiled.append(ct)
+        # tables are ordered by uf, year desc, created_at desc: first one wins
+        by_uf.setdefault(t.uf, ct)
+    h = hashlib.sha256(str(generation).encode())
+    for t in compiled:
+        h.update(f"|{t.id}:{t.source_hash or ''}".encode())
+    return ActiveTablesSnapshot(tables=tuple(compiled), by_uf=by_uf, generation=generation, etag_base=h.hexdigest())
+
+
+_snapshot: Optional[ActiveTablesSnapshot] = None
+_lock = threading.Lock()
+_poll_lock = threading.Lock()
+_last_poll = 0.0
+
+
+def refresh_snapshot(db: Optional[Session] = None) -> ActiveTablesSnapshot:
+    """Rebuild the snapshot from the database and swap it in."""
+    global _snapshot
+    with _lock:
+        if db is None:
+            s = SessionLocal()
+            try:
+                snap = load_snapshot(s)
+            finally:
+                s.close()
+        else:
+            snap = load_snapshot(db)
+        _snapshot = snap
+        return snap
+
+
+def _swap(snap: ActiveTablesSnapshot) -> ActiveTablesSnapshot:
+    global _snapshot
+    cur = _snapshot
+    # never replace a newer snapshot with an older one loaded concurrently
+    if cur is None or snap.generation >= cur.generation:
+        _snapshot = snap
+    return _snapshot
+
+
+def _poll_due() -> bool:
+    """True (holding _poll_lock) if this caller should check the generation now."""
+    global _last_poll
+    now = time.monotonic()
+    if now - _last_poll < SNAPSHOT_POLL_SECONDS or not _poll_lock.acquire(blocking=False):
+        return False
+    _last_poll = now
+    return True
+
+
+def poll_generation() -> bool:
+    """Reload the snapshot if another worker/instance changed the tables. True if reloaded."""
+    db = SessionLocal()
+    try:
+        g = read_generation(db)
+        snap = _snapshot
+        if snap is not None and snap.generation == g:
+            return False
+        with _lock:
+            snap = _swap(load_snapshot(db))
+        logger.info("[snapshot] reloaded at generation %s", snap.generation)
+        return True
+    finally:
+        db.close()
+
+
+def get_snapshot() -> ActiveTablesSnapshot:
+    snap = _snapshot
+    if snap is None:
+        return refresh_snapshot()
+    # only one thread polls; the others keep answering from the current snapshot
+    if _poll_due():
+        try:
+            if poll_generation():
+                snap = _snapshot
+        except Exception:
+            logger.exception("[snapshot] generation poll failed; serving current snapshot")
+        finally:
+            _poll_lock.release()
+    return snap
+
+
+async def poll_generation_async() -> bool:
+    """``poll_generation`` over the async engine, for async handlers."""
+    async with AsyncSessionLocal() as db:
+        g = await db.run_sync(read_generation)
+        snap = _snapshot
+        if snap is not None and snap.generation == g:
+            return False
+        snap = _swap(await db.run_sync(load_snapshot))
+    logger.info("[snapshot] reloaded at generation %s", snap.generation)
+    return True
+
+
+async def get_snapshot_async() -> ActiveTablesSnapshot:
+    """Like ``get_snapshot`` but never does blocking DB I/O on the event loop."""
+    if _snapshot is None:
+        async with AsyncSessionLocal() as db:
+            return _swap(await db.run_sync(load_snapshot))
+    if _poll_due():
+        try:
+            await poll_generation_async()
+        except Exception:
+            logger.exception("[snapshot] generation poll failed; serving current snapshot")
+        finally:
+            _poll_lock.release()
+    return _snapshot
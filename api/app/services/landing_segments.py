@@ -0,0 +1,151 @@
+"""Precomputed answers of the landing calculator (POST /calcular) per origin UF.
+
+With a fixed snapshot every UF's emolumento is piecewise-constant in the
+property value, so the landing answer is too. For an origin UF we sweep the
+breakpoints of its own table and of the cross-UF minimum envelope once, and
+store one row per segment; a quote is then a dict lookup plus a bisect.
+
+Segments start at bracket lower bounds and at the float right after each
+upper bound (``math.nextafter``), so any float input lands on exactly the
+row the bracket scan would have produced. Structures are cached on the
+snapshot (``snapshot.derived``) and therefore rebuilt with it.
+"""
+
+from __future__ import annotations
+
+import math
+from bisect import bisect_left, bisect_right, insort
+from operator import itemgetter
+from typing import List, NamedTuple, Optional, Tuple
+
+from app.services.emolument_snapshot import ActiveTablesSnapshot, CompiledTable
+
+COMMISSION_RATE = 0.35
+
+Step = Tuple[float, Optional[float]]
+
+
+class LandingQuote(NamedTuple):
+    custo_local: float
+    custo_pratico: float
+    economia: float
+    economia_pct: float
+    comissao_corretor: float
+    best_uf: str
+
+
+def _amount(t: CompiledTable, value: float) -> Optional[float]:
+    q = t.quote(value)
+    return q["emolumento"] if q else None
+
+
+def _steps(t: CompiledTable) -> List[Step]:
+    """[(start, amount)] for a table, first start -inf; amount None = no bracket."""
+    points = set(t.range_from)
+    points.update(math.nextafter(x, math.inf) for x in t.range_to)
+    out = [(-math.inf, _amount(t, -math.inf))]
+    for s in sorted(points):
+        a = _amount(t, s)
+        if a != out[-1][1]:
+            out.append((s, a))
+    return out
+
+
+def _envelope(snap: ActiveTablesSnapshot) -> List[Tuple[float, Optional[float], Optional[str]]]:
+    """[(start, min non-zero amount, UF)] over the latest table of each UF.
+
+    Ties go to the first UF in snapshot order, like the landing loop's strict <.
+    """
+    order = list(snap.by_uf)
+    current: List[Optional[float]] = []
+    events = []
+    for rank, uf in enumerate(order):
+        steps = _steps(snap.by_uf[uf])
+        current.append(steps[0][1])
+        events.extend((s, rank, a) for s, a in steps[1:])
+    events.sort(key=itemgetter(0, 1))
+
+    live = sorted((a, rank) for rank, a in enumerate(current) if a)
+
+    def top():
+        return (live[0][0], order[live[0][1]]) if live else (None, None)
+
+    env = [(-math.inf, *top())]
+    i, n = 0, len(events)
+    while i < n:
+        s = events[i][0]
+        while i < n and events[i][0] == s:
+            _, rank, a = events[i]
+            old = current[rank]
+            if old:
+                del live[bisect_left(live, (old, rank))]
+            if a:
+                insort(live, (a, rank))
+            current[rank] = a
+            i += 1
+        m = top()
+        if m != env[-1][1:]:
+            env.append((s, *m))
+    return env
+
+
+def _row(uf: str, custo_local: Optional[float], env_amount: Optional[float], env_uf: Optional[str]) -> Optional[LandingQuote]:
+    if custo_local is None:
+        return None
+    menor, best = custo_local, uf
+    if env_amount is not None and env_amount < custo_local:
+        menor, best = env_amount, env_uf
+    economia = round(custo_local - menor, 2)
+    economia_pct = round((economia / custo_local) * 100, 2) if custo_local else 0
+    return LandingQuote(custo_local, menor, economia, economia_pct, round(economia * COMMISSION_RATE, 2), best)
+
+
+class LandingSegments:
+    __slots__ = ("uf", "starts", "rows")
+
+    def __init__(self, uf: str, starts: List[float], rows: List[Optional[LandingQuote]]):
+        self.uf = uf
+        self.starts = starts
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def quote(self, valor: float) -> Optional[LandingQuote]:
+        """Landing answer for ``valor``; None when the origin UF has no bracket for it."""
+        if valor != valor:  # NaN matches no bracket
+            return None
+        return self.rows[bisect_right(self.starts, valor) - 1]
+
+
+def build_landing_segments(snap: ActiveTablesSnapshot, uf: str) -> Optional[LandingSegments]:
+    t = snap.table_for(uf)
+    if t is None:
+        return None
+    env = snap.derived.get("landing_envelope")
+    if env is None:
+        env = snap.derived["landing_envelope"] = _envelope(snap)
+    local = _steps(t)
+
+    starts: List[float] = []
+    rows: List[Optional[LandingQuote]] = []
+    i = j = 0
+    for s in sorted({p for p, _ in local} | {e[0] for e in env}):
+        while i + 1 < len(local) and local[i + 1][0] <= s:
+            i += 1
+        while j + 1 < len(env) and env[j + 1][0] <= s:
+            j += 1
+        row = _row(uf, local[i][1], env[j][1], env[j][2])
+        if not rows or row != rows[-1]:
+            starts.append(s)
+            rows.append(row)
+    return LandingSegments(uf, starts, rows)
+
+
+def landing_segments(snap: ActiveTablesSnapshot, uf: str) -> Optional[LandingSegments]:
+    """Segments for origin ``uf`` in this snapshot, built on first use."""
+    key = ("landing", uf)
+    seg = snap.derived.get(key)
+    if seg is None and uf in snap.by_uf:
+        seg = snap.derived[key] = build_landing_segments(snap, uf)
+    return seg
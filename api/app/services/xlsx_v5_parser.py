@@ -6,15 +6,20 @@ Extrai faixas de escritura com valor econômico por UF.
 from __future__ import annotations
 
 import hashlib
+import io
 import re
 import zipfile
 import xml.etree.ElementTree as ET
 from dataclasses import dataclass
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import IO, Callable, Collection, Dict, Iterable, List, Optional, Tuple
 
 _NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
 _REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
 _OFFICE_REL_ATTR = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+_SHEET_DATA_TAG = "{%s}sheetData" % _NS["m"]
+_ROW_TAG = "{%s}row" % _NS["m"]
+_CELL_TAG = "{%s}c" % _NS["m"]
+_TEXT_TAG = "{%s}t" % _NS["m"]
 
 
 @dataclass(frozen=True)
@@ -35,6 +40,8 @@ def _cell_col(ref: str) -> str:
 def _to_float(v) -> Optional[float]:
     if v is None:
         return None
+    if isinstance(v, (int, float)):
+        return float(v)
     s = str(v).strip()
     if s == "":
         return None
@@ -83,43 +90,81 @@ def _workbook_sheet_map(z: zipfile.ZipFile) -> Dict[str, str]:
 
 
 def _cell_value(c: ET.Element, shared: List[str]):
+    """Decode a cell by its OpenXML type (``t`` attribute).
+
+    Numeric cells (no ``t`` or ``t="n"``) are returned as float right away;
+    only text (shared, inline or formula strings) goes through the locale
+    cleanup in ``_to_float``.
+    """
     t = c.get("t")
+    if t == "inlineStr":
+        is_ = c.find("m:is", _NS)
+        if is_ is None:
+            return None
+        return "".join(x.text or "" for x in is_.iter(_TEXT_TAG))
     v = c.find("m:v", _NS)
     if v is None or v.text is None:
         return None
     val = v.text
+    if t is None or t == "n":
+        try:
+            return float(val)
+        except ValueError:
+            return val
     if t == "s":
         try:
             return shared[int(val)]
         except Exception:
             return None
+    if t == "e":
+        # formula error (#N/A, #VALUE!...)
+        return None
     return val
 
 
-def _iter_rows(z: zipfile.ZipFile, sheet_xml_path: str, shared: List[str]) -> Iterable[Tuple[int, Dict[str, object]]]:
-    root = ET.fromstring(z.read(sheet_xml_path))
-    sheet_data = root.find("m:sheetData", _NS)
-    if sheet_data is None:
-        return
-    for row in sheet_data.findall("m:row", _NS):
-        r = row.get("r")
-        if not r:
-            continue
-        r_i = int(r)
-        d: Dict[str, object] = {}
-        for c in row.findall("m:c", _NS):
-            ref = c.get("r")
-            if not ref:
+def _iter_rows(
+    open_sheet: Callable[[], IO[bytes]],
+    shared: List[str],
+    columns: Optional[Collection[str]] = None,
+    min_row: int = 0,
+) -> Iterable[Tuple[int, Dict[str, object]]]:
+    """Stream the worksheet rows with iterparse, dropping each row once yielded.
+
+    ``open_sheet`` returns a fresh binary stream of the worksheet XML. Only
+    cells in ``columns`` are decoded (all when None) and rows numbered below
+    ``min_row`` are skipped, so memory stays flat on large sheets.
+    """
+    with open_sheet() as fh:
+        sheet_data = None
+        for event, el in ET.iterparse(fh, events=("start", "end")):
+            if event == "start":
+                if el.tag == _SHEET_DATA_TAG:
+                    sheet_data = el
                 continue
-            col = _cell_col(ref)
-            val = _cell_value(c, shared)
-            if val not in (None, ""):
-                d[col] = val
-        if d:
-            yield r_i, d
-
-
-def _find_header_row(rows: List[Tuple[int, Dict[str, object]]]) -> Optional[Tuple[int, str, str, str]]:
+            if el.tag != _ROW_TAG:
+                continue
+            r = el.get("r")
+            d: Dict[str, object] = {}
+            if r and int(r) >= min_row:
+                for c in el.iter(_CELL_TAG):
+                    ref = c.get("r")
+                    if not ref:
+                        continue
+                    col = _cell_col(ref)
+                    if columns is not None and col not in columns:
+                        continue
+                    val = _cell_value(c, shared)
+                    if val not in (None, ""):
+                        d[col] = val
+            if sheet_data is not None:
+                sheet_data.clear()
+            else:
+                el.clear()
+            if d:
+                yield int(r), d
+
+
+def _find_header_row(rows: Iterable[Tuple[int, Dict[str, object]]]) -> Optional[Tuple[int, str, str, str]]:
     def norm(x) -> str:
         return re.sub(r"\s+", " ", str(x)).strip().lower()
 
@@ -133,38 +178,44 @@ def _find_header_row(rows: List[Tuple[int, Dict[str, object]]]) -> Optional[Tupl
     return None
 
 
+def _parse_sheet(open_sheet: Callable[[], IO[bytes]], shared: List[str]) -> List[Bracket]:
+    rows = _iter_rows(open_sheet, shared)
+    try:
+        header = _find_header_row(rows)
+    finally:
+        rows.close()
+    if not header:
+        return []
+    header_row, col_de, col_ate, col_emo = header
+    brackets: List[Bracket] = []
+    cols = (col_de, col_ate, col_emo)
+    for r, d in _iter_rows(open_sheet, shared, columns=cols, min_row=header_row + 1):
+        de = _to_float(d.get(col_de))
+        ate = _to_float(d.get(col_ate))
+        amt = _to_float(d.get(col_emo))
+        if ate is None or amt is None:
+            continue
+        if de is None:
+            de = 0.0
+        brackets.append(Bracket(range_from=de, range_to=ate, amount=amt))
+    brackets.sort(key=lambda b: (b.range_from, b.range_to))
+    return brackets
+
+
 def parse_v5_xlsx(xlsx_bytes: bytes) -> tuple[str, Dict[str, List[Bracket]]]:
     """Retorna (hash, {UF: [Bracket...]})"""
     file_hash = sha256_bytes(xlsx_bytes)
     by_uf: Dict[str, List[Bracket]] = {}
 
-    with zipfile.ZipFile(io := __import__("io").BytesIO(xlsx_bytes)) as z:
+    with zipfile.ZipFile(io.BytesIO(xlsx_bytes)) as z:
         shared = _load_shared_strings(z)
         sheet_map = _workbook_sheet_map(z)
 
         # UFs válidas são abas com 2 letras
-        for name, sheet_xml in sheet_map.items():
-            if not re.fullmatch(r"[A-Z]{2}", name):
-                continue
-            rows = list(_iter_rows(z, sheet_xml, shared))
-            header = _find_header_row(rows)
-            if not header:
-                continue
-            header_row, col_de, col_ate, col_emo = header
-            brackets: List[Bracket] = []
-            for r, d in rows:
-                if r <= header_row:
-                    continue
-                de = _to_float(d.get(col_de))
-                ate = _to_float(d.get(col_ate))
-                amt = _to_float(d.get(col_emo))
-                if ate is None or amt is None:
-                    continue
-                if de is None:
-                    de = 0.0
-                brackets.append(Bracket(range_from=de, range_to=ate, amount=amt))
-            if brackets:
-                brackets.sort(key=lambda b: (b.range_from, b.range_to))
-                by_uf[name] = brackets
+        uf_sheets = [(name, path) for name, path in sheet_map.items() if re.fullmatch(r"[A-Z]{2}", name)]
+        results = [(name, _parse_sheet(lambda p=path: z.open(p), shared)) for name, path in uf_sheets]
 
+    for name, brackets in results:
+        if brackets:
+            by_uf[name] = brackets
     return file_hash, by_uf
@@ -0,0 +1,135 @@
+"""Testes da escrita incremental das tabelas v5 (write_v5_tables).
+
+Rodar de dentro de api/:
+    python -m pytest -q test_emolument_import.py
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db"))
+
+import pytest  # noqa: E402
+
+import app.models  # noqa: E402,F401  (registra as tabelas no Base)
+from app.db.base import Base  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.models.emoluments import EmolumentBracket, EmolumentTable, TableStatus  # noqa: E402
+from app.services.emolument_import import write_v5_tables  # noqa: E402
+from app.services.emolument_snapshot import ensure_generation_row, read_generation  # noqa: E402
+from app.services.xlsx_v5_parser import Bracket  # noqa: E402
+
+YEAR = 2026
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    s = SessionLocal()
+    ensure_generation_row(s)  # como no startup da API
+    try:
+        yield s
+    finally:
+        s.close()
+
+
+def _tabela(*faixas):
+    return [Bracket(range_from=a, range_to=b, amount=c) for a, b, c in faixas]
+
+
+def _escrever(db, by_uf, year=YEAR):
+    diff = write_v5_tables(db, year=year, by_uf=by_uf, source_name="v5.xlsx", source_hash="h", created_by=None)
+    db.commit()
+    return diff
+
+
+def _ativas(db, year=YEAR):
+    """{UF: (table_id, [(de, ate, emolumento)])} das tabelas ativas do ano."""
+    out = {}
+    for t in db.query(EmolumentTable).filter(EmolumentTable.year == year, EmolumentTable.status == TableStatus.active):
+        assert t.uf not in out, f"mais de uma tabela ativa para {t.uf}"
+        brs = (
+            db.query(EmolumentBracket)
+            .filter(EmolumentBracket.table_id == t.id, EmolumentBracket.active == True)  # noqa: E712
+            .order_by(EmolumentBracket.sort_order)
+            .all()
+        )
+        out[t.uf] = (t.id, [(float(b.range_from), float(b.range_to), float(b.amount)) for b in brs])
+    return out
+
+
+def _conteudo(by_uf):
+    return {uf: [(b.range_from, b.range_to, b.amount) for b in brs] for uf, brs in by_uf.items()}
+
+
+AC = _tabela((0, 1000, 10.5), (1000.01, 5000, 50))
+AL = _tabela((0, 2000, 12), (2000.01, 9000, 31.25))
+AL2 = _tabela((0, 2000, 12), (2000.01, 9000, 31.26))
+AM = _tabela((0, 999999999, 99.99))
+
+
+def test_primeira_importacao_cria_todas(db):
+    diff = _escrever(db, {"AC": AC, "AL": AL})
+    assert diff["created"] == ["AC", "AL"]
+    assert diff["updated"] == [] and diff["unchanged"] == [] and diff["not_in_file"] == []
+    assert diff["tables_created"] == 2 and diff["brackets_created"] == 4
+    assert {uf: brs for uf, (_, brs) in _ativas(db).items()} == _conteudo({"AC": AC, "AL": AL})
+    assert read_generation(db) == 1
+
+
+def test_reimportacao_so_reescreve_ufs_alteradas(db):
+    _escrever(db, {"AC": AC, "AL": AL})
+    antes = _ativas(db)
+
+    diff = _escrever(db, {"AC": AC, "AL": AL2, "AM": AM})
+    assert diff["created"] == ["AM"]
+    assert diff["updated"] == ["AL"]
+    assert diff["unchanged"] == ["AC"]
+    assert diff["tables_created"] == 2
+
+    depois = _ativas(db)
+    # o resultado é o mesmo de arquivar tudo e recriar (importação original)...
+    assert {uf: brs for uf, (_, brs) in depois.items()} == _conteudo({"AC": AC, "AL": AL2, "AM": AM})
+    # ...mas a UF igual mantém a tabela (e o id) e a alterada vira uma nova
+    assert depois["AC"][0] == antes["AC"][0]
+    assert depois["AL"][0] != antes["AL"][0]
+    velha = db.query(EmolumentTable).filter(EmolumentTable.id == antes["AL"][0]).one()
+    assert velha.status == TableStatus.archived
+    assert read_generation(db) == 2
+
+
+def test_reimportacao_identica_nao_mexe_em_nada(db):
+    _escrever(db, {"AC": AC, "AL": AL})
+    antes = _ativas(db)
+    diff = _escrever(db, {"AC": AC, "AL": AL})
+    assert diff["created"] == [] and diff["updated"] == [] and diff["unchanged"] == ["AC", "AL"]
+    assert diff["tables_created"] == 0 and diff["brackets_created"] == 0
+    assert _ativas(db) == antes
+    # nada mudou: os snapshots dos workers não precisam recarregar
+    assert read_generation(db) == 1
+
+
+def test_uf_fora_do_arquivo_fica_como_esta(db):
+    _escrever(db, {"AC": AC, "AM": AM})
+    antes = _ativas(db)
+    diff = _escrever(db, {"AC": AC})
+    assert diff["not_in_file"] == ["AM"] and diff["unchanged"] == ["AC"]
+    assert _ativas(db) == antes
+
+
+def test_anos_sao_independentes(db):
+    _escrever(db, {"AC": AC})
+    diff = _escrever(db, {"AC": AC}, year=YEAR + 1)
+    assert diff["created"] == ["AC"]
+    assert set(_ativas(db)) == {"AC"} and set(_ativas(db, YEAR + 1)) == {"AC"}
+
+
+def test_diferenca_abaixo_do_centavo_nao_conta(db):
+    # as faixas são gravadas com 2 casas: 10.501 e 10.50 viram o mesmo valor
+    _escrever(db, {"AC": AC})
+    diff = _escrever(db, {"AC": _tabela((0, 1000, 10.501), (1000.01, 5000, 50))})
+    assert diff["unchanged"] == ["AC"]
@@ -0,0 +1,197 @@
+"""Testes dos segmentos pré-calculados do POST /calcular (landing_segments).
+
+Compara ``LandingSegments.quote`` com a varredura de faixas original
+(``get_emolumento_for_value`` + laço pelo menor emolumento), lendo as mesmas
+tabelas do banco.
+
+Rodar de dentro de api/:
+    python -m pytest -q test_landing_segments.py
+"""
+import math
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db"))
+
+import pytest  # noqa: E402
+
+import app.models  # noqa: E402,F401  (registra as tabelas no Base)
+from app.db.base import Base  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.models.emoluments import EmolumentBracket, EmolumentTable, TableStatus  # noqa: E402
+from app.services.emolument_import import write_v5_tables  # noqa: E402
+from app.services.emolument_snapshot import ensure_generation_row, load_snapshot  # noqa: E402
+from app.services.landing_segments import landing_segments  # noqa: E402
+from app.services.xlsx_v5_parser import parse_v5_xlsx  # noqa: E402
+
+XLSX = project_root.parent / "legacy" / "data" / "Pratico_Emolumentos_v5.xlsx"
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    s = SessionLocal()
+    ensure_generation_row(s)
+    try:
+        yield s
+    finally:
+        s.close()
+
+
+def _inserir(db, uf, faixas, *, year=2026, created_at=None, status=TableStatus.active):
+    t = EmolumentTable(uf=uf, year=year, status=status, created_at=created_at or datetime(2026, 1, 1))
+    db.add(t)
+    db.flush()
+    for i, (a, b, c, *ativa) in enumerate(faixas):
+        db.add(EmolumentBracket(table_id=t.id, range_from=a, range_to=b, amount=c, sort_order=i, active=ativa[0] if ativa else True))
+
+
+def _sintetica(db):
+    """Tabelas com o que a planilha real não tem: faixas sobrepostas, buraco,
+    emolumento zero, UF começando acima de zero, tabela vazia, empates e
+    tabelas antigas/arquivadas/faixas inativas que não podem valer."""
+    _inserir(db, "AC", [(0, 1000, 10), (1000.01, 5000, 50), (6000, 10000, 80)])
+    # sobrepostas: vale a primeira por range_from
+    _inserir(db, "AL", [(0, 2000, 12), (1500, 3000, 8), (2500, 9000, 30), (8999.99, 9500, 5)])
+    _inserir(db, "AM", [(500, 3000, 0), (3000.01, 20000, 80)])
+    _inserir(db, "BA", [(0, 999999, 0)])
+    _inserir(db, "DF", [(0, 4000, 10), (4000.01, 6000, 30)])
+    _inserir(db, "ES", [])
+    # GO: só a mais nova ativa conta; a faixa inativa e a arquivada são ignoradas
+    _inserir(db, "GO", [(0, 999999, 1)], year=2025)
+    _inserir(db, "GO", [(0, 999999, 2)], created_at=datetime(2025, 12, 1))
+    _inserir(db, "GO", [(0, 999999, 1)], status=TableStatus.archived)
+    _inserir(db, "GO", [(0, 100, 3, False), (0.01, 7000, 25), (7000.01, 7000.01, 0.5)])
+    _inserir(db, "SP", [(0, 999999999, 40)])
+    db.commit()
+
+
+def _tabelas_originais(db):
+    """As consultas de get_emolumento_for_value, feitas uma vez por UF:
+    {UF: [(de, ate, emolumento)]} em ordem de range_from."""
+    out = {}
+    for (uf,) in db.query(EmolumentTable.uf).filter(EmolumentTable.status == TableStatus.active).distinct():
+        t = (
+            db.query(EmolumentTable)
+            .filter(EmolumentTable.uf == uf, EmolumentTable.status == TableStatus.active)
+            .order_by(EmolumentTable.year.desc(), EmolumentTable.created_at.desc())
+            .first()
+        )
+        bs = (
+            db.query(EmolumentBracket)
+            .filter(EmolumentBracket.table_id == t.id, EmolumentBracket.active == True)  # noqa: E712
+            .order_by(EmolumentBracket.range_from.asc())
+            .all()
+        )
+        out[uf] = [(float(b.range_from), float(b.range_to), float(b.amount)) for b in bs]
+    return out
+
+
+def _emolumento_original(bs, property_value):
+    for de, ate, emolumento in bs:
+        if de <= property_value <= ate:
+            return emolumento
+    if bs and property_value > bs[-1][1]:
+        return bs[-1][2]
+    return None
+
+
+def _landing_original(emolumentos, uf):
+    """O POST /calcular original, com o emolumento de cada UF já calculado."""
+    custo_local = emolumentos[uf]
+    if custo_local is None:
+        return None
+    menor_emolumento = custo_local
+    for emol in emolumentos.values():
+        if emol and emol < menor_emolumento:
+            menor_emolumento = emol
+    economia = round(custo_local - menor_emolumento, 2)
+    economia_pct = round((economia / custo_local) * 100, 2) if custo_local else 0
+    comissao_corretor = round(economia * 0.35, 2)
+    return (custo_local, menor_emolumento, economia, economia_pct, comissao_corretor)
+
+
+def _valores(tabelas, n_aleatorios):
+    """Bordas das faixas (o float vizinho, meio centavo e um centavo de cada lado),
+    aleatórios e inválidos."""
+    valores = {0.0, -0.0, 0.01, 1e12, -0.01, -1000.0, math.inf, -math.inf}
+    for bs in tabelas.values():
+        for de, ate, _ in bs:
+            for x in (de, ate):
+                valores.update((x, math.nextafter(x, -math.inf), math.nextafter(x, math.inf)))
+                valores.update((x - 0.01, x - 0.005, x + 0.005, x + 0.01))
+    rnd = random.Random(19)
+    teto = max(bs[-1][1] for bs in tabelas.values() if bs) * 1.1
+    valores.update(rnd.uniform(0, teto) for _ in range(n_aleatorios))
+    valores.update(rnd.randint(0, int(teto * 100)) / 100 for _ in range(n_aleatorios))
+    return sorted(valores) + [math.nan]
+
+
+def _comparar(db, valores=None, n_aleatorios=500):
+    snap = load_snapshot(db)
+    tabelas = _tabelas_originais(db)
+    assert set(snap.by_uf) == set(tabelas)
+    if valores is None:
+        valores = _valores(tabelas, n_aleatorios)
+    segmentos = {uf: landing_segments(snap, uf) for uf in tabelas}
+    erros = []
+    for v in valores:
+        emolumentos = {uf: _emolumento_original(bs, v) for uf, bs in tabelas.items()}
+        for uf, seg in segmentos.items():
+            r = seg.quote(v)
+            obtido = tuple(r)[:5] if r is not None else None
+            esperado = _landing_original(emolumentos, uf)
+            if obtido != esperado:
+                erros.append((uf, v, obtido, esperado))
+            elif r is not None:
+                # a UF apontada tem mesmo o emolumento mais barato
+                assert emolumentos[r.best_uf] == r.custo_pratico, (uf, v, r)
+    assert erros[:10] == []
+
+
+def test_sintetica_igual_a_varredura_original(db):
+    _sintetica(db)
+    _comparar(db)
+
+
+def test_sobreposicao_zero_e_bordas(db):
+    _sintetica(db)
+    snap = load_snapshot(db)
+    al, am, es = (landing_segments(snap, uf) for uf in ("AL", "AM", "ES"))
+    # AL 1500..2000 cai na primeira faixa (12), não na sobreposta (8)
+    assert al.quote(1750).custo_local == 12
+    assert al.quote(2000).custo_local == 12
+    assert al.quote(math.nextafter(2000, math.inf)).custo_local == 8
+    # AM tem emolumento zero de 500 a 3000: zero não conta como mais barato,
+    # e a origem com custo zero fica sem economia
+    assert am.quote(499.99) is None
+    q = am.quote(500)
+    assert (q.custo_local, q.custo_pratico, q.economia, q.economia_pct) == (0, 0, 0, 0)
+    sp = landing_segments(snap, "SP")
+    # nem AM nem BA (zero): empate AC/DF em 10 fica com a primeira UF
+    assert sp.quote(500)[1:] == (10, 30, 75, 10.5, "AC")
+    # GO: vale a tabela mais nova (25), não a de 2025, a mais antiga nem a arquivada
+    assert sp.quote(5500)[1:] == (25, 15, 37.5, 5.25, "GO")
+    # a faixa inativa de GO (0..100 por 3) não conta
+    assert landing_segments(snap, "GO").quote(50).custo_local == 25
+    # tabela ativa sem faixas: nunca há custo local
+    assert es is not None and es.quote(1000) is None
+    assert landing_segments(snap, "RJ") is None
+
+
+def test_planilha_real_igual_a_varredura_original(db):
+    _, by_uf = parse_v5_xlsx(XLSX.read_bytes())
+    write_v5_tables(db, year=2026, by_uf=by_uf, source_name=XLSX.name, source_hash="h", created_by=None)
+    db.commit()
+    tabelas = _tabelas_originais(db)
+    # a referência é linear no total de faixas: amostra fixa das bordas
+    valores = _valores(tabelas, 300)
+    valores = random.Random(20).sample(valores[:-1], 1500) + [math.nan]
+    _comparar(db, valores)
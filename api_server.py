@@ -3,6 +3,30 @@
 Endpoints:
 - GET /health
 - GET /escritura?uf=SP&valor=500000
+- GET /ranking?valor=500000 — UFs da mais barata para a mais cara
+- GET /metrics — contadores do cache de respostas e das recargas (por processo)
+- POST /escritura/lote — lista JSON de pares ({"uf", "valor"} ou [uf, valor]);
+  com Content-Type application/x-ndjson, um par por linha. A resposta sai em
+  streaming (chunked), na mesma ordem e no mesmo formato da entrada.
+
+Modos de servidor (variável EMOLUMENTOS_SERVER_MODE):
+- thread (padrão): ThreadingHTTPServer com pool limitado de threads
+  (EMOLUMENTOS_THREADS, padrão 32) e keep-alive HTTP/1.1;
+- async: servidor asyncio HTTP/1.1 com keep-alive, numa única thread;
+- single: HTTPServer de uma thread só (comportamento original);
+- prefork: o pai carrega as tabelas e cria EMOLUMENTOS_WORKERS processos
+  (padrão: nº de CPUs), cada um com seu socket SO_REUSEPORT na mesma porta e
+  um pool de threads como no modo thread. As tabelas são herdadas por
+  copy-on-write e o pai reinicia workers que morrerem. Só Linux/BSD.
+
+Conexões keep-alive ociosas são fechadas após EMOLUMENTOS_KEEPALIVE_TIMEOUT
+segundos (padrão 5).
+
+Recarga a quente: uma thread de fundo confere a planilha (EMOLUMENTOS_XLSX)
+por stat a cada EMOLUMENTOS_RELOAD_INTERVAL segundos (padrão 2; 0 desliga).
+Se ela mudou, lê e valida a nova (27 UFs, faixas crescentes e disjuntas) fora
+do caminho das requisições e só então troca a calculadora de uma vez; uma
+planilha inválida ou pela metade é ignorada e a anterior continua no ar.
 
 Execução:
     python3 api_server.py
@@ -12,12 +36,27 @@ Obs: Usa apenas stdlib.
 
 from __future__ import annotations
 
+import asyncio
+import gc
 import json
+import math
 import os
-from http.server import BaseHTTPRequestHandler, HTTPServer
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from contextlib import suppress
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+from typing import Callable, Hashable, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 from urllib.parse import parse_qs, urlparse
 
 from calculadora_emolumentos_v5 import CalculadoraEmolumentosV5
+from emolumentos_v5 import CACHE_TABELAS
 
 
 XLSX_PATH = os.environ.get(
@@ -25,65 +64,688 @@ XLSX_PATH = os.environ.get(
     os.path.join(os.path.dirname(__file__), "legacy", "data", "Pratico_Emolumentos_v5.xlsx"),
 )
 
+MODOS = ("thread", "async", "single", "prefork")
+SERVER_MODE = os.environ.get("EMOLUMENTOS_SERVER_MODE", "thread").strip().lower()
+THREADS = int(os.environ.get("EMOLUMENTOS_THREADS", "32"))
+WORKERS = int(os.environ.get("EMOLUMENTOS_WORKERS", "0")) or (os.cpu_count() or 1)
+KEEPALIVE_TIMEOUT = float(os.environ.get("EMOLUMENTOS_KEEPALIVE_TIMEOUT", "5"))
+MAX_CORPO = int(os.environ.get("EMOLUMENTOS_MAX_BODY", str(16 * 1024 * 1024)))
+RELOAD_INTERVALO = float(os.environ.get("EMOLUMENTOS_RELOAD_INTERVAL", "2"))
+# respostas de /escritura guardadas já codificadas (0 desliga)
+CACHE_RESPOSTAS_MAX = int(os.environ.get("EMOLUMENTOS_RESPONSE_CACHE", "4096"))
+
+JSON_CT = "application/json; charset=utf-8"
+NDJSON_CT = "application/x-ndjson; charset=utf-8"
+# itens do lote por chunk da resposta
+_LOTE_BLOCO = 256
+
 calc = CalculadoraEmolumentosV5(XLSX_PATH)
 
 
+class CacheRespostas:
+    """LRU limitado de respostas já codificadas: um acerto pula o cálculo e o json.dumps.
+
+    As entradas pertencem a uma calculadora (``dono``); se ela for trocada o
+    cache se esvazia sozinho na próxima consulta.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._dados: "OrderedDict[Hashable, Tuple[int, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dono = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def obter(self, dono, chave: Hashable, gerar: Callable[[], Tuple[int, bytes]]) -> Tuple[int, bytes]:
+        with self._lock:
+            if self._dono is not dono:
+                self._dados.clear()
+                self._dono = dono
+            item = self._dados.get(chave)
+            if item is not None:
+                self._dados.move_to_end(chave)
+                self.hits += 1
+                return item
+            self.misses += 1
+        item = gerar()
+        with self._lock:
+            if self._dono is dono and self.maxsize > 0:
+                self._dados[chave] = item
+                if len(self._dados) > self.maxsize:
+                    self._dados.popitem(last=False)
+                    self.evictions += 1
+        return item
+
+    def estatisticas(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "tamanho": len(self._dados),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+CACHE_RESPOSTAS = CacheRespostas(CACHE_RESPOSTAS_MAX)
+
+
+class _Recargas:
+    lock = threading.Lock()
+    recargas = 0
+    falhas = 0
+    ultimo_erro = ""
+    # assinatura (CACHE_TABELAS) que já falhou: não tenta de novo até o arquivo mudar outra vez
+    rejeitada: Optional[Tuple[int, int, int]] = None
+
+
+def recarregar_planilha() -> bool:
+    """Troca ``calc`` se a planilha mudou em disco e a nova é válida. True se trocou.
+
+    A mudança é detectada pelo cache de tabelas (stat com mtime, tamanho e
+    inode): enquanto o arquivo não muda ele devolve as mesmas tabelas. A
+    troca é uma única atribuição: requisições em andamento terminam com a
+    calculadora que já tinham em mãos e as novas pegam a nova inteira.
+    """
+    global calc
+    with _Recargas.lock:
+        try:
+            sig = CACHE_TABELAS.assinatura(os.path.abspath(XLSX_PATH))
+        except OSError:
+            return False
+        if sig == _Recargas.rejeitada:
+            return False
+        try:
+            nova = CalculadoraEmolumentosV5(XLSX_PATH)
+            if nova.tabelas is calc.tabelas:
+                return False
+            nova.tabelas.validar()
+            nova.tabelas.envelope  # /ranking não paga a montagem na primeira requisição
+        except Exception as e:
+            # arquivo ainda sendo copiado, corrompido ou com faixas inválidas
+            _Recargas.falhas += 1
+            _Recargas.ultimo_erro = f"{type(e).__name__}: {e}"
+            _Recargas.rejeitada = sig
+            print(f"[reload] planilha ignorada ({_Recargas.ultimo_erro}); mantendo a anterior", file=sys.stderr, flush=True)
+            return False
+        calc = nova
+        _Recargas.recargas += 1
+        _Recargas.rejeitada = None
+        print(f"[reload] planilha recarregada (sha256={nova.tabelas.sha256[:12]})", file=sys.stderr, flush=True)
+        return True
+
+
+def _observar_planilha(intervalo: float) -> None:
+    while True:
+        time.sleep(intervalo)
+        try:
+            recarregar_planilha()
+        except Exception:
+            traceback.print_exc()
+
+
+def iniciar_observador() -> Optional[threading.Thread]:
+    """Sobe a thread de recarga (uma por processo que atende requisições)."""
+    if RELOAD_INTERVALO <= 0:
+        return None
+    t = threading.Thread(target=_observar_planilha, args=(RELOAD_INTERVALO,), name="emolumentos-reload", daemon=True)
+    t.start()
+    return t
+
+
+def _json(payload: dict) -> bytes:
+    return (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class Resposta(NamedTuple):
+    status: int
+    # bytes (Content-Length) ou iterável de bytes (enviado em chunks)
+    corpo: Union[bytes, Iterable[bytes]]
+    tipo: str = JSON_CT
+
+
+def _erro(status: int, msg: str) -> Resposta:
+    return Resposta(status, _json({"erro": msg}))
+
+
+def _eco(x):
+    """``x`` como veio no pedido, se o JSON estrito consegue representá-lo; senão None."""
+    if x is None or isinstance(x, (str, bool, int)) or (isinstance(x, float) and math.isfinite(x)):
+        return x
+    return None
+
+
+def _cotar(c: CalculadoraEmolumentosV5, uf, valor) -> dict:
+    """Resultado de /escritura para um par; erros viram {"erro": ...} no próprio item.
+
+    Itens com erro ecoam uf/valor só quando isso não gera NaN/Infinity (JSON
+    inválido), para um item ruim não estragar o lote inteiro.
+    """
+    if not isinstance(uf, str) or not uf.strip():
+        return {"uf": _eco(uf), "valor": _eco(valor), "erro": "Parâmetros obrigatórios: uf, valor"}
+    uf = uf.strip().upper()
+    try:
+        v = float(valor)
+    except (TypeError, ValueError):
+        return {"uf": uf, "valor": _eco(valor), "erro": "valor deve ser numérico"}
+    if not math.isfinite(v):
+        return {"uf": uf, "valor": None, "erro": "valor deve ser um número finito"}
+    try:
+        r = c.calcular_escritura_valor(uf, v)
+    except KeyError as e:
+        # UF sem aba na planilha
+        return {"uf": uf, "valor": v, "erro": e.args[0]}
+    if "erro" in r:
+        return {"uf": uf, "valor": v, **r}
+    return r
+
+
+def _par(item) -> tuple:
+    if isinstance(item, dict):
+        return item.get("uf"), item.get("valor")
+    if isinstance(item, (list, tuple)) and len(item) == 2:
+        return item[0], item[1]
+    return None, None
+
+
+def _lote_json(c: CalculadoraEmolumentosV5, itens: list) -> Iterator[bytes]:
+    yield b"["
+    for i in range(0, len(itens), _LOTE_BLOCO):
+        bloco = ",\n".join(json.dumps(_cotar(c, *_par(it)), ensure_ascii=False) for it in itens[i : i + _LOTE_BLOCO])
+        yield (("\n" if i == 0 else ",\n") + bloco).encode("utf-8")
+    yield b"\n]\n" if itens else b"]\n"
+
+
+def _lote_ndjson(c: CalculadoraEmolumentosV5, linhas: List[bytes]) -> Iterator[bytes]:
+    bloco = []
+    for linha in linhas:
+        try:
+            r = _cotar(c, *_par(json.loads(linha)))
+        except ValueError:
+            r = {"erro": "Linha inválida"}
+        bloco.append(json.dumps(r, ensure_ascii=False))
+        if len(bloco) >= _LOTE_BLOCO:
+            yield ("\n".join(bloco) + "\n").encode("utf-8")
+            bloco = []
+    if bloco:
+        yield ("\n".join(bloco) + "\n").encode("utf-8")
+
+
+def _escritura_lote(corpo: bytes, tipo: str) -> Resposta:
+    # a calculadora é lida uma vez: o lote inteiro usa a mesma planilha
+    c = calc
+    if "ndjson" in tipo or "jsonl" in tipo:
+        linhas = [linha for linha in corpo.splitlines() if linha.strip()]
+        return Resposta(200, _lote_ndjson(c, linhas), NDJSON_CT)
+    try:
+        dados = json.loads(corpo or b"null")
+    except ValueError:
+        return _erro(400, "JSON inválido")
+    if isinstance(dados, dict):
+        dados = dados.get("itens")
+    if not isinstance(dados, list):
+        return _erro(400, 'Envie uma lista de pares ({"uf", "valor"} ou [uf, valor]) ou {"itens": [...]}')
+    return Resposta(200, _lote_json(c, dados))
+
+
+def despachar(metodo: str, alvo: str, corpo: bytes = b"", tipo: str = "") -> Resposta:
+    """Roteia uma requisição e devolve a ``Resposta`` (corpo JSON já codificado).
+
+    Compartilhado por todos os modos de servidor, que só cuidam do protocolo.
+    ``tipo`` é o Content-Type da requisição.
+    """
+    u = urlparse(alvo)
+    if metodo == "POST" and u.path == "/escritura/lote":
+        return _escritura_lote(corpo, tipo.lower())
+    if metodo != "GET":
+        return _erro(405, "Método não suportado")
+
+    if u.path == "/health":
+        return Resposta(200, _json({"ok": True}))
+
+    if u.path == "/metrics":
+        recargas = {
+            "sha256": calc.tabelas.sha256,
+            "recargas": _Recargas.recargas,
+            "falhas": _Recargas.falhas,
+            "ultimo_erro": _Recargas.ultimo_erro,
+        }
+        return Resposta(200, _json({"pid": os.getpid(), "cache_respostas": CACHE_RESPOSTAS.estatisticas(), "planilha": recargas}))
+
+    if u.path == "/escritura":
+        q = parse_qs(u.query)
+        uf = (q.get("uf") or [""])[0].strip().upper()
+        valor_s = (q.get("valor") or [""])[0].strip()
+        if not uf or not valor_s:
+            return _erro(400, "Parâmetros obrigatórios: uf, valor")
+        try:
+            valor = float(valor_s)
+        except ValueError:
+            return _erro(400, "valor deve ser numérico")
+
+        c = calc
+
+        def gerar() -> Tuple[int, bytes]:
+            r = _cotar(c, uf, valor)
+            return 400 if "erro" in r else 200, _json(r)
+
+        # a resposta ecoa o valor: só valores com até 2 casas (valor == centavos/100)
+        # compartilham a entrada do cache
+        if CACHE_RESPOSTAS.maxsize > 0 and math.isfinite(valor):
+            cent = round(valor * 100)
+            if cent / 100 == valor:
+                return Resposta(*CACHE_RESPOSTAS.obter(c, (uf, cent), gerar))
+        return Resposta(*gerar())
+
+    if u.path == "/ranking":
+        valor_s = (parse_qs(u.query).get("valor") or [""])[0].strip()
+        if not valor_s:
+            return _erro(400, "Parâmetro obrigatório: valor")
+        try:
+            valor = float(valor_s)
+        except ValueError:
+            return _erro(400, "valor deve ser numérico")
+        if not (math.isfinite(valor) and valor >= 0):
+            return _erro(400, "Valor inválido")
+        ranking = calc.ranking_por_valor(valor)
+        return Resposta(200, _json({"valor": valor, "ranking": [{"uf": uf, "emolumento": emo} for uf, emo in ranking]}))
+
+    return _erro(404, "Not found")
+
+
+def _content_length(valor: Optional[str]) -> Optional[int]:
+    """Content-Length da requisição (0 se ausente); None se não for um inteiro >= 0."""
+    if not valor:
+        return 0
+    valor = valor.strip()
+    if not (valor.isascii() and valor.isdigit()):
+        return None
+    return int(valor)
+
+
+def _chunk(dados: bytes) -> bytes:
+    return b"%X\r\n%b\r\n" % (len(dados), dados)
+
+
 class Handler(BaseHTTPRequestHandler):
-    def _send(self, code: int, payload: dict):
-        data = (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+    def _send_bytes(self, code: int, data: bytes, tipo: str = JSON_CT):
         self.send_response(code)
-        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Type", tipo)
         self.send_header("Content-Length", str(len(data)))
         self.end_headers()
         self.wfile.write(data)
 
+    def _send_stream(self, code: int, partes: Iterable[bytes], tipo: str):
+        chunked = self.protocol_version >= "HTTP/1.1" and self.request_version >= "HTTP/1.1"
+        self.send_response(code)
+        self.send_header("Content-Type", tipo)
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            # HTTP/1.0: o fim do corpo é o fim da conexão
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        try:
+            for dados in partes:
+                if dados:
+                    self.wfile.write(_chunk(dados) if chunked else dados)
+        except Exception:
+            # status já enviado: só resta cortar a conexão (o cliente vê a resposta truncada)
+            self.close_connection = True
+            raise
+        if chunked:
+            self.wfile.write(b"0\r\n\r\n")
+
+    def _send(self, code: int, payload: dict):
+        self._send_bytes(code, _json(payload))
+
+    def _responder(self, r: Resposta):
+        if isinstance(r.corpo, bytes):
+            self._send_bytes(r.status, r.corpo, r.tipo)
+        else:
+            self._send_stream(r.status, r.corpo, r.tipo)
+
     def do_GET(self):
-        u = urlparse(self.path)
-        if u.path == "/health":
-            return self._send(200, {"ok": True})
-
-        if u.path == "/escritura":
-            q = parse_qs(u.query)
-            uf = (q.get("uf") or [""])[0].strip().upper()
-            valor_s = (q.get("valor") or [""])[0].strip()
-            if not uf or not valor_s:
-                return self._send(400, {"erro": "Parâmetros obrigatórios: uf, valor"})
+        self._responder(despachar("GET", self.path))
+
+    def do_POST(self):
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            # corpo chunked não é lido: o que sobrasse viraria a "próxima requisição"
+            self.close_connection = True
+            return self._send(411, {"erro": "Envie Content-Length"})
+        tamanho = _content_length(self.headers.get("Content-Length"))
+        if tamanho is None:
+            # sem saber onde o corpo termina a conexão não tem como continuar
+            self.close_connection = True
+            return self._send(400, {"erro": "Content-Length inválido"})
+        if tamanho > MAX_CORPO:
+            self.close_connection = True
+            return self._send(413, {"erro": "Corpo grande demais"})
+        corpo = self.rfile.read(tamanho) if tamanho > 0 else b""
+        self._responder(despachar("POST", self.path, corpo, self.headers.get("Content-Type", "")))
+
+
+class KeepAliveHandler(Handler):
+    """Handler HTTP/1.1: a conexão fica aberta entre requisições até o timeout."""
+
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT
+    # cabeçalho e corpo saem em writes separados: sem TCP_NODELAY o Nagle
+    # segura a resposta seguinte na mesma conexão
+    disable_nagle_algorithm = True
+
+
+class PooledHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer com no máximo ``max_workers`` conexões atendidas ao mesmo tempo.
+
+    Com o pool cheio o laço de accept espera uma vaga, e as conexões novas
+    ficam no backlog do kernel em vez de virarem threads sem limite.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, server_address, handler_class, max_workers: int = THREADS):
+        super().__init__(server_address, handler_class)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="emolumentos")
+        self._vagas = threading.BoundedSemaphore(max_workers)
+
+    def process_request(self, request, client_address):
+        self._vagas.acquire()
+        try:
+            self._pool.submit(self._atender, request, client_address)
+        except BaseException:
+            self._vagas.release()
+            self.shutdown_request(request)
+            raise
+
+    def _atender(self, request, client_address):
+        try:
+            self.process_request_thread(request, client_address)
+        finally:
+            self._vagas.release()
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False)
+
+
+class ReusePortHTTPServer(PooledHTTPServer):
+    """PooledHTTPServer com SO_REUSEPORT: vários processos escutam na mesma porta."""
+
+    def server_bind(self):
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+
+# --- modo async -----------------------------------------------------------
+
+_MAX_CABECALHOS = 100
+
+
+def _cabecalho_http(status: int, tipo: str, tamanho, manter: bool, chunked: bool = False) -> bytes:
+    """Linha de status + cabeçalhos; sem ``tamanho`` o corpo vai chunked ou até o fim da conexão."""
+    if tamanho is not None:
+        corpo = f"Content-Length: {tamanho}\r\n"
+    else:
+        corpo = "Transfer-Encoding: chunked\r\n" if chunked else ""
+    return (
+        f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+        f"Content-Type: {tipo}\r\n"
+        f"{corpo}"
+        f"Connection: {'keep-alive' if manter else 'close'}\r\n"
+        "\r\n"
+    ).encode("latin-1")
+
+
+def _resposta_http(status: int, dados: bytes, manter: bool, tipo: str = JSON_CT) -> bytes:
+    return _cabecalho_http(status, tipo, len(dados), manter) + dados
+
+
+async def _enviar(writer: asyncio.StreamWriter, r: Resposta, manter: bool, versao: str) -> bool:
+    """Escreve a resposta; devolve se a conexão pode continuar aberta."""
+    if isinstance(r.corpo, bytes):
+        writer.write(_resposta_http(r.status, r.corpo, manter, r.tipo))
+        await writer.drain()
+        return manter
+    # HTTP/1.0 não conhece chunked: o fim do corpo é o fim da conexão
+    chunked = versao != "HTTP/1.0"
+    manter = manter and chunked
+    writer.write(_cabecalho_http(r.status, r.tipo, None, manter, chunked))
+    for dados in r.corpo:
+        if dados:
+            writer.write(_chunk(dados) if chunked else dados)
+            await writer.drain()
+    if chunked:
+        writer.write(b"0\r\n\r\n")
+    await writer.drain()
+    return manter
+
+
+async def _ler_linha(reader: asyncio.StreamReader) -> bytes:
+    return await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+
+
+async def _atender_conexao(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Atende uma conexão HTTP/1.1, com várias requisições em sequência (keep-alive)."""
+    try:
+        while True:
+            linha = await _ler_linha(reader)
+            if not linha:
+                break
+            if linha in (b"\r\n", b"\n"):
+                continue
+            partes = linha.decode("latin-1").split()
+            if len(partes) != 3 or not partes[2].startswith("HTTP/"):
+                writer.write(_resposta_http(400, _json({"erro": "Requisição inválida"}), False))
+                break
+            metodo, alvo, versao = partes
+
+            cabecalhos = {}
+            while True:
+                h = await _ler_linha(reader)
+                if h in (b"\r\n", b"\n", b""):
+                    break
+                nome, _, valor = h.decode("latin-1").partition(":")
+                cabecalhos[nome.strip().lower()] = valor.strip()
+                if len(cabecalhos) > _MAX_CABECALHOS:
+                    break
+            if len(cabecalhos) > _MAX_CABECALHOS:
+                writer.write(_resposta_http(431, _json({"erro": "Cabeçalhos demais"}), False))
+                break
+            if "chunked" in cabecalhos.get("transfer-encoding", "").lower():
+                writer.write(_resposta_http(411, _json({"erro": "Envie Content-Length"}), False))
+                break
+
+            tamanho = _content_length(cabecalhos.get("content-length"))
+            if tamanho is None:
+                writer.write(_resposta_http(400, _json({"erro": "Content-Length inválido"}), False))
+                break
+            if tamanho > MAX_CORPO:
+                writer.write(_resposta_http(413, _json({"erro": "Corpo grande demais"}), False))
+                break
+            corpo = await reader.readexactly(tamanho) if tamanho > 0 else b""
+
+            conexao = cabecalhos.get("connection", "").lower()
+            if versao == "HTTP/1.0":
+                manter = conexao == "keep-alive"
+            else:
+                manter = conexao != "close"
+
             try:
-                valor = float(valor_s)
-            except ValueError:
-                return self._send(400, {"erro": "valor deve ser numérico"})
+                r = despachar(metodo, alvo, corpo, cabecalhos.get("content-type", ""))
+            except Exception:
+                traceback.print_exc()
+                r, manter = _erro(500, "Erro interno"), False
+            if not await _enviar(writer, r, manter, versao):
+                break
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+        # timeout de keep-alive, cliente que caiu ou linha longa demais
+        pass
+    finally:
+        writer.close()
+        with suppress(Exception):
+            await writer.wait_closed()
 
-            r = calc.calcular_escritura_valor(uf, valor)
-            if "erro" in r:
-                return self._send(400, r)
-            return self._send(200, r)
 
-        return self._send(404, {"erro": "Not found"})
+async def _servir_async(host: str, portas: Iterable[int], porta_explicita: bool) -> None:
+    for port in portas:
+        try:
+            server = await asyncio.start_server(_atender_conexao, host, port)
+        except OSError:
+            if porta_explicita:
+                raise
+            continue
+        port_real = server.sockets[0].getsockname()[1]
+        print(f"API on http://{host}:{port_real} (xlsx={XLSX_PATH}, modo=async)")
+        async with server:
+            await server.serve_forever()
+        return
+    raise RuntimeError("Não foi possível abrir uma porta para o servidor HTTP")
 
 
-def main():
-    host = os.environ.get("HOST", "0.0.0.0")
+# --- modo prefork ---------------------------------------------------------
+
+# worker que morre antes disso após iniciar é reiniciado com atraso (evita laço quente)
+_PREFORK_VIDA_MINIMA = 1.0
+
+
+def _reservar_porta(host: str, portas: Iterable[int], porta_explicita: bool) -> socket.socket:
+    """Socket SO_REUSEPORT apenas ligado (sem listen) que segura a porta no pai.
+
+    Resolve a porta 0 uma vez só e impede outro processo de tomar a porta
+    enquanto os workers sobem e são reiniciados.
+    """
+    for port in portas:
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        try:
+            s.bind((host, port))
+        except OSError:
+            s.close()
+            if porta_explicita:
+                raise
+            continue
+        return s
+    raise RuntimeError("Não foi possível abrir uma porta para o servidor HTTP")
+
+
+def _worker_prefork(reserva: socket.socket, host: str, port: int) -> None:
+    codigo = 1
+    try:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        reserva.close()
+        # threads não sobrevivem ao fork: cada worker observa a planilha por conta própria
+        iniciar_observador()
+        httpd = ReusePortHTTPServer((host, port), KeepAliveHandler, THREADS)
+        httpd.serve_forever()
+        codigo = 0
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        os._exit(codigo)
+
+
+def _servir_prefork(host: str, portas: Iterable[int], porta_explicita: bool) -> None:
+    if not hasattr(socket, "SO_REUSEPORT") or not hasattr(os, "fork"):
+        raise SystemExit("EMOLUMENTOS_SERVER_MODE=prefork exige fork e SO_REUSEPORT (Linux/BSD)")
+
+    reserva = _reservar_porta(host, portas, porta_explicita)
+    port = reserva.getsockname()[1]
+    # tudo que os workers usam fica pronto no pai e é herdado por copy-on-write;
+    # gc.freeze evita que o coletor dos filhos toque (e copie) essas páginas
+    calc.tabelas.envelope
+    gc.freeze()
+    print(f"API on http://{host}:{port} (xlsx={XLSX_PATH}, modo=prefork, workers={WORKERS})", flush=True)
+
+    filhos = {}  # pid -> instante em que subiu
+    parando = False
+
+    def iniciar() -> None:
+        pid = os.fork()
+        if pid == 0:
+            _worker_prefork(reserva, host, port)
+        filhos[pid] = time.monotonic()
+
+    def parar(signum, frame):
+        nonlocal parando
+        parando = True
+        for pid in list(filhos):
+            with suppress(ProcessLookupError):
+                os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, parar)
+    signal.signal(signal.SIGINT, parar)
+    for _ in range(WORKERS):
+        iniciar()
+
+    while filhos:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        inicio = filhos.pop(pid, None)
+        if inicio is None or parando:
+            continue
+        print(f"[prefork] worker {pid} saiu (código {os.waitstatus_to_exitcode(status)}); reiniciando", file=sys.stderr, flush=True)
+        if time.monotonic() - inicio < _PREFORK_VIDA_MINIMA:
+            time.sleep(_PREFORK_VIDA_MINIMA)
+        if not parando:
+            iniciar()
+    reserva.close()
+
+
+# --- inicialização --------------------------------------------------------
+
+
+def _criar_servidor(host: str, port: int) -> HTTPServer:
+    if SERVER_MODE == "single":
+        return HTTPServer((host, port), Handler)
+    return PooledHTTPServer((host, port), KeepAliveHandler, THREADS)
+
+
+def _portas() -> Tuple[List[int], bool]:
     # Observação: alguns ambientes (incl. este) exportam PORT já ocupado.
     # Então só respeitamos PORT se o usuário explicitamente setar EMOLUMENTOS_USE_PORT=1.
     port_env = os.environ.get("PORT")
     use_port = os.environ.get("EMOLUMENTOS_USE_PORT") == "1"
     if use_port and port_env:
-        port = int(port_env)
-        httpd = HTTPServer((host, port), Handler)
-        print(f"API on http://{host}:{port} (xlsx={XLSX_PATH})")
-        httpd.serve_forever()
+        return [int(port_env)], True
+    # tenta portas comuns e escolhe a primeira livre
+    return [8080, 8099, 18080, 18888, 0], False
+
+
+def main():
+    host = os.environ.get("HOST", "0.0.0.0")
+    if SERVER_MODE not in MODOS:
+        raise SystemExit(f"EMOLUMENTOS_SERVER_MODE inválido: {SERVER_MODE!r} (use {', '.join(MODOS)})")
+    portas, explicita = _portas()
+
+    if SERVER_MODE == "prefork":
+        _servir_prefork(host, portas, explicita)
+        return
+    iniciar_observador()
+    if SERVER_MODE == "async":
+        asyncio.run(_servir_async(host, portas, explicita))
         return
 
-    # tenta portas comuns e escolhe a primeira livre
-    for port in (8080, 8099, 18080, 18888, 0):
+    for port in portas:
         try:
-            httpd = HTTPServer((host, port), Handler)
-            port_real = httpd.server_address[1]
-            print(f"API on http://{host}:{port_real} (xlsx={XLSX_PATH})")
-            httpd.serve_forever()
-            return
+            httpd = _criar_servidor(host, port)
         except OSError:
+            if explicita:
+                raise
             continue
+        port_real = httpd.server_address[1]
+        print(f"API on http://{host}:{port_real} (xlsx={XLSX_PATH}, modo={SERVER_MODE})")
+        httpd.serve_forever()
+        return
 
     raise RuntimeError("Não foi possível abrir uma porta para o servidor HTTP")
 
@@ -11,11 +11,18 @@ Uso:
 
 from __future__ import annotations
 
+import math
 import os
+from bisect import bisect_right
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 
-from emolumentos_v5 import PlanilhaEmolumentosV5
+from emolumentos_v5 import PlanilhaEmolumentosV5, ResultadoEscritura, TabelasEscrituraV5, centavos
+
+try:  # opcional: acelera calcular_lote
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy não é dependência
+    np = None
 
 
 @dataclass
@@ -36,29 +43,111 @@ class CalculadoraEmolumentosV5:
             xlsx_path = os.path.join(os.path.dirname(__file__), "legacy", "data", "Pratico_Emolumentos_v5.xlsx")
         self.xlsx_path = xlsx_path
         self._planilha = PlanilhaEmolumentosV5(self.xlsx_path)
+        # snapshot imutável de todas as UFs, lido de uma vez só
+        self.tabelas: TabelasEscrituraV5 = self._planilha.carregar_todas_faixas()
+        # arrays por UF usados em calcular_lote (refeitos quando o snapshot muda)
+        self._lote: Tuple[Optional[TabelasEscrituraV5], Dict[str, tuple]] = (None, {})
+
+    def recarregar_se_alterada(self) -> bool:
+        """Troca o snapshot se a planilha mudou em disco. Retorna True se trocou."""
+        tabelas = self._planilha.carregar_todas_faixas()
+        if tabelas is self.tabelas:
+            return False
+        self.tabelas = tabelas
+        return True
 
     def calcular_escritura_valor(self, uf: str, valor: float) -> Dict[str, object]:
         """Retorna o emolumento da escritura com valor, baseado na faixa da planilha."""
-        return self._planilha.calcular_escritura_por_valor(uf, valor)
+        return self.tabelas.calcular_escritura_por_valor(uf, valor)
+
+    def cotar_escritura_valor(self, uf: str, valor: float) -> Optional[ResultadoEscritura]:
+        """Como ``calcular_escritura_valor``, mas retorna um ``ResultadoEscritura`` compacto.
+
+        Retorna None se nenhuma faixa cobre o valor; ValueError para valor inválido.
+        """
+        return self.tabelas.cotar_escritura(uf, valor)
+
+    def _arrays_lote(self, uf: str) -> tuple:
+        tabelas = self.tabelas
+        if self._lote[0] is not tabelas:
+            self._lote = (tabelas, {})
+        cache = self._lote[1]
+        arrs = cache.get(uf)
+        if arrs is None:
+            idx = tabelas.indice(uf)
+            if np is not None:
+                arrs = (
+                    np.asarray(idx.de_centavos, dtype=np.int64),
+                    np.asarray(idx.ate_centavos, dtype=np.int64),
+                    np.asarray(idx.emolumento_centavos, dtype=np.int64) / 100,
+                )
+            else:
+                arrs = (idx.de_centavos, idx.ate_centavos, [e / 100 for e in idx.emolumento_centavos])
+            cache[uf] = arrs
+        return arrs
+
+    def calcular_lote(self, ufs: Union[str, Sequence[str]], valores: Sequence[float]):
+        """Emolumentos de vários pares (UF, valor) numa chamada só.
+
+        ``ufs`` pode ser uma UF única (aplicada a todos os valores) ou uma
+        sequência do mesmo tamanho de ``valores``. Valores inválidos ou sem
+        faixa resultam em NaN; acima do teto usa a última faixa, como em
+        ``calcular_escritura_valor``. Com NumPy instalado aceita/retorna
+        ``numpy.ndarray`` (busca vetorizada com ``searchsorted``); sem NumPy
+        retorna uma lista de floats.
+        """
+        if isinstance(ufs, str):
+            ufs = [ufs] * len(valores)
+        elif len(ufs) != len(valores):
+            raise ValueError("ufs e valores devem ter o mesmo tamanho")
+        ufs_norm = [u.upper().strip() for u in ufs]
+
+        if np is not None:
+            vals = np.asarray(valores, dtype=float)
+            out = np.full(vals.shape, np.nan)
+            ufs_arr = np.asarray(ufs_norm)
+            for uf in set(ufs_norm):
+                de, ate, emo = self._arrays_lote(uf)
+                mask = ufs_arr == uf
+                v = vals[mask]
+                # valores em centavos (float64 exato nessa faixa; inf/NaN preservados)
+                c = np.rint(v * 100)
+                i = np.searchsorted(de, c, side="right") - 1
+                ic = np.clip(i, 0, len(de) - 1)
+                res = np.where((i >= 0) & (c <= ate[ic]), emo[ic], np.nan)
+                res = np.where(c > ate[-1], emo[-1], res)
+                res[v < 0] = np.nan
+                out[mask] = res
+            return out
+
+        nan = math.nan
+        out_l: List[float] = []
+        for uf, valor in zip(ufs_norm, valores):
+            de, ate, emo = self._arrays_lote(uf)
+            if valor is None or not valor >= 0:
+                out_l.append(nan)
+                continue
+            c = round(valor * 100) if valor < 1e16 else centavos(valor)
+            i = bisect_right(de, c) - 1
+            if i >= 0 and c <= ate[i]:
+                out_l.append(emo[i])
+            elif c > ate[-1]:
+                out_l.append(emo[-1])
+            else:
+                out_l.append(nan)
+        return out_l
 
     def ranking_por_valor(self, valor: float) -> List[Tuple[str, float]]:
         """Ranking (UF, emolumento) para um valor específico.
 
-        Observação: usa as abas por UF (27 UFs). Mais lento que uma tabela já consolidada,
-        mas é a forma mais fiel.
+        Observação: usa o envelope pré-computado das 27 UFs (uma busca binária
+        por consulta); empates seguem a ordem de ``emolumentos_v5.UFS``.
         """
-        ufs = [
-            "AC","AL","AM","AP","BA","CE","DF","ES","GO","MA","MT","MS","MG","PA",
-            "PB","PE","PR","PI","RJ","RN","RS","RO","RR","SC","SE","SP","TO",
-        ]
-        out = []
-        for uf in ufs:
-            r = self.calcular_escritura_valor(uf, valor)
-            if "emolumento" in r:
-                out.append((uf, float(r["emolumento"])))
-        out.sort(key=lambda x: x[1])
-        return out
+        return self.tabelas.envelope.ranking(valor)
 
+    def melhor_uf(self, valor: float) -> Optional[Tuple[str, float]]:
+        """(UF, emolumento) mais barato para o valor, ou None se nenhuma UF cobre o valor."""
+        return self.tabelas.envelope.melhor(valor)
 
 if __name__ == "__main__":
     calc = CalculadoraEmolumentosV5()
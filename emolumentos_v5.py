@@ -8,17 +8,48 @@ Implementação: abre o .xlsx como ZIP e lê os XMLs internos (OpenXML).
 
 from __future__ import annotations
 
+import hashlib
+import mmap
 import os
 import re
+import struct
+import sys
+import tempfile
+import threading
+import time
 import zipfile
 import xml.etree.ElementTree as ET
+from array import array
+from bisect import bisect_right, insort
 from dataclasses import dataclass
-from functools import lru_cache
-from typing import Dict, Iterable, List, Optional, Tuple
+from collections import OrderedDict
+from functools import cached_property
+from types import MappingProxyType
+from typing import Callable, Collection, Dict, Hashable, Iterable, List, Mapping, Optional, Sequence, Tuple, TypeVar
+
+_T = TypeVar("_T")
 
 _NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
 _REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
 _OFFICE_REL_ATTR = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+_SHEET_DATA_TAG = "{%s}sheetData" % _NS["m"]
+_ROW_TAG = "{%s}row" % _NS["m"]
+_CELL_TAG = "{%s}c" % _NS["m"]
+_TEXT_TAG = "{%s}t" % _NS["m"]
+
+# 27 UFs (26 estados + DF), na ordem usada para desempatar o ranking
+UFS = (
+    "AC", "AL", "AM", "AP", "BA", "CE", "DF", "ES", "GO", "MA", "MT", "MS", "MG", "PA",
+    "PB", "PE", "PR", "PI", "RJ", "RN", "RS", "RO", "RR", "SC", "SE", "SP", "TO",
+)
+
+# Cache compilado em disco (ao lado da planilha): header + diretório por UF +
+# arrays int64 little-endian em centavos (de, ate, emolumento) de cada UF.
+_CACHE_SUFFIX = ".v5cache"
+_CACHE_MAGIC = b"EMV5"
+_CACHE_VERSION = 3
+_CACHE_HEADER = struct.Struct("<4sHH32sqqI4x")  # magic, versão, reservado, sha256, mtime_ns, tamanho, n_ufs
+_CACHE_ENTRY = struct.Struct("<2s2xIQ")  # uf, n_faixas, offset dos arrays
 
 
 @dataclass(frozen=True)
@@ -28,11 +59,522 @@ class FaixaEscritura:
     emolumento: float
 
 
+# teto para valores consultados (evita overflow de int64 com valores absurdos/inf)
+_MAX_CENTAVOS = 2 ** 62
+
+
+def centavos(valor: float) -> int:
+    """Converte reais (float) para centavos inteiros, arredondando ao centavo."""
+    if valor >= _MAX_CENTAVOS / 100:
+        return _MAX_CENTAVOS
+    return int(round(valor * 100))
+
+
+def reais(centavos: int) -> float:
+    """Converte centavos inteiros de volta para reais (formato de exibição)."""
+    return centavos / 100
+
+
+class BracketIndex:
+    """Índice compilado das faixas de uma UF, consultado por busca binária.
+
+    Guarda limites e emolumentos em centavos inteiros, em arrays paralelos
+    (``array('q')`` ou views do cache compilado em disco) ordenados por
+    ``de``. Parte do princípio de que as faixas não se sobrepõem (caso da
+    planilha v5); valores que caem entre duas faixas continuam sem faixa.
+    """
+
+    __slots__ = ("de_centavos", "ate_centavos", "emolumento_centavos")
+
+    def __init__(self, de_centavos: Sequence[int], ate_centavos: Sequence[int], emolumento_centavos: Sequence[int]):
+        if not (len(de_centavos) == len(ate_centavos) == len(emolumento_centavos)):
+            raise ValueError("Arrays de faixas com tamanhos diferentes")
+        self.de_centavos = de_centavos
+        self.ate_centavos = ate_centavos
+        self.emolumento_centavos = emolumento_centavos
+
+    @classmethod
+    def from_faixas(cls, faixas: Iterable[FaixaEscritura]) -> "BracketIndex":
+        ordenadas = sorted(faixas, key=lambda f: (f.de, f.ate))
+        return cls(
+            array("q", (centavos(f.de) for f in ordenadas)),
+            array("q", (centavos(f.ate) for f in ordenadas)),
+            array("q", (centavos(f.emolumento) for f in ordenadas)),
+        )
+
+    def __len__(self) -> int:
+        return len(self.de_centavos)
+
+    def localizar(self, valor_centavos: int) -> int:
+        """Posição da faixa que contém o valor (em centavos), ou -1 se nenhuma contém."""
+        i = bisect_right(self.de_centavos, valor_centavos) - 1
+        if i >= 0 and valor_centavos <= self.ate_centavos[i]:
+            return i
+        return -1
+
+    def faixa(self, i: int) -> FaixaEscritura:
+        return FaixaEscritura(
+            de=reais(self.de_centavos[i]),
+            ate=reais(self.ate_centavos[i]),
+            emolumento=reais(self.emolumento_centavos[i]),
+        )
+
+
+class CotacaoFaixa:
+    """Parte fixa (por faixa) de uma cotação; imutável e reaproveitada entre chamadas."""
+
+    __slots__ = ("uf", "emolumento", "de", "ate", "fonte", "observacao")
+
+    def __init__(self, uf: str, emolumento: float, de: float, ate: float, fonte: str, observacao: str = ""):
+        object.__setattr__(self, "uf", uf)
+        object.__setattr__(self, "emolumento", emolumento)
+        object.__setattr__(self, "de", de)
+        object.__setattr__(self, "ate", ate)
+        object.__setattr__(self, "fonte", fonte)
+        object.__setattr__(self, "observacao", observacao)
+
+    def __setattr__(self, name: str, value: object) -> None:
+        raise AttributeError("CotacaoFaixa é imutável")
+
+
+class ResultadoEscritura:
+    """Resultado compacto de uma cotação: o valor consultado + a faixa (compartilhada).
+
+    Alternativa leve ao dict de ``calcular_escritura_por_valor``; o dict só é
+    montado quando ``para_dict()`` é chamado.
+    """
+
+    __slots__ = ("valor", "faixa")
+
+    def __init__(self, valor: float, faixa: CotacaoFaixa):
+        self.valor = valor
+        self.faixa = faixa
+
+    @property
+    def uf(self) -> str:
+        return self.faixa.uf
+
+    @property
+    def emolumento(self) -> float:
+        return self.faixa.emolumento
+
+    def para_dict(self) -> Dict[str, object]:
+        f = self.faixa
+        d: Dict[str, object] = {
+            "uf": f.uf,
+            "valor": self.valor,
+            "emolumento": f.emolumento,
+            "faixa": {"de": f.de, "ate": f.ate},
+            "fonte": f.fonte,
+        }
+        if f.observacao:
+            d["observacao"] = f.observacao
+        return d
+
+    def __repr__(self) -> str:
+        return f"ResultadoEscritura({self.para_dict()!r})"
+
+
+def _cotar(
+    idx: BracketIndex, uf: str, valor: float, fonte: str, cache: Optional[Dict[Tuple[str, int], CotacaoFaixa]] = None
+) -> Optional[ResultadoEscritura]:
+    c = centavos(valor)
+    i = idx.localizar(c)
+    observacao = ""
+    if i < 0:
+        # se não achou, tenta última faixa (ex.: Até 999999999)
+        i = len(idx) - 1
+        if c <= idx.ate_centavos[i]:
+            return None
+        observacao = "Valor acima do teto da planilha; usando última faixa."
+        chave = (uf, -1)
+    else:
+        chave = (uf, i)
+
+    faixa = cache.get(chave) if cache is not None else None
+    if faixa is None:
+        faixa = CotacaoFaixa(
+            uf,
+            reais(idx.emolumento_centavos[i]),
+            reais(idx.de_centavos[i]),
+            reais(idx.ate_centavos[i]),
+            fonte,
+            observacao,
+        )
+        if cache is not None:
+            cache[chave] = faixa
+    return ResultadoEscritura(valor, faixa)
+
+
+def _resultado_escritura(idx: BracketIndex, uf: str, valor: float, fonte: str) -> Dict[str, object]:
+    r = _cotar(idx, uf, valor, fonte)
+    if r is None:
+        return {"erro": "Nenhuma faixa encontrada para o valor informado"}
+    return r.para_dict()
+
+
+@dataclass(frozen=True)
+class TabelasEscrituraV5:
+    """Snapshot imutável das faixas de escritura de todas as UFs da planilha.
+
+    Criado por ``PlanilhaEmolumentosV5.carregar_todas_faixas()``; pode ser
+    mantido pela calculadora durante toda a vida do processo.
+    """
+
+    fonte: str
+    indices: Mapping[str, BracketIndex]
+    sha256: str = ""
+
+    @classmethod
+    def from_faixas(cls, fonte: str, by_uf: Mapping[str, Iterable[FaixaEscritura]], sha256: str = "") -> "TabelasEscrituraV5":
+        indices = {uf: BracketIndex.from_faixas(fs) for uf, fs in by_uf.items()}
+        return cls(fonte=fonte, indices=MappingProxyType(indices), sha256=sha256)
+
+    @cached_property
+    def faixas(self) -> Mapping[str, Tuple[FaixaEscritura, ...]]:
+        return MappingProxyType({
+            uf: tuple(idx.faixa(i) for i in range(len(idx)))
+            for uf, idx in self.indices.items()
+        })
+
+    @property
+    def ufs(self) -> List[str]:
+        return sorted(self.indices)
+
+    def __contains__(self, uf: object) -> bool:
+        return uf in self.indices
+
+    @cached_property
+    def envelope(self) -> "EnvelopeRanking":
+        """Ranking nacional pré-computado (montado no primeiro uso)."""
+        return EnvelopeRanking(self.indices, UFS)
+
+    def validar(self, ufs_esperadas: Sequence[str] = UFS) -> None:
+        """Levanta ValueError se faltar alguma UF ou se as faixas de uma UF não
+        forem crescentes e disjuntas (De <= Até < De da faixa seguinte)."""
+        faltando = sorted(set(ufs_esperadas) - set(self.indices))
+        if faltando:
+            raise ValueError(f"UFs ausentes na planilha: {', '.join(faltando)}")
+        for uf in self.ufs:
+            idx = self.indices[uf]
+            if not len(idx):
+                raise ValueError(f"{uf}: nenhuma faixa encontrada")
+            de, ate, emo = idx.de_centavos, idx.ate_centavos, idx.emolumento_centavos
+            for i in range(len(idx)):
+                if de[i] > ate[i]:
+                    raise ValueError(f"{uf}: faixa {i + 1} com De maior que Até")
+                if emo[i] < 0:
+                    raise ValueError(f"{uf}: faixa {i + 1} com emolumento negativo")
+                if i and de[i] <= ate[i - 1]:
+                    raise ValueError(f"{uf}: faixas {i} e {i + 1} sobrepostas")
+
+    def indice(self, uf: str) -> BracketIndex:
+        idx = self.indices.get(uf)
+        if idx is None:
+            raise KeyError(f"Aba não encontrada para UF={uf}. Abas disponíveis: {self.ufs}")
+        return idx
+
+    @cached_property
+    def _cotacoes(self) -> Dict[Tuple[str, int], CotacaoFaixa]:
+        return {}
+
+    def cotar_escritura(self, uf: str, valor: float) -> Optional[ResultadoEscritura]:
+        """Versão compacta de ``calcular_escritura_por_valor``.
+
+        Retorna um ``ResultadoEscritura`` (a parte da faixa é cacheada e
+        compartilhada entre chamadas) ou None se nenhuma faixa cobre o valor.
+        Levanta ValueError para valor inválido.
+        """
+        uf = uf.upper().strip()
+        if valor is None or not float(valor) >= 0:
+            raise ValueError("Valor inválido")
+        return _cotar(self.indice(uf), uf, float(valor), self.fonte, self._cotacoes)
+
+    def calcular_escritura_por_valor(self, uf: str, valor: float) -> Dict[str, object]:
+        try:
+            r = self.cotar_escritura(uf, valor)
+        except ValueError:
+            return {"erro": "Valor inválido"}
+        if r is None:
+            return {"erro": "Nenhuma faixa encontrada para o valor informado"}
+        return r.para_dict()
+
+
+class EnvelopeRanking:
+    """Ranking nacional de UFs pré-computado por trecho de valor do imóvel.
+
+    O emolumento de cada UF é constante por partes no valor do imóvel. A união
+    dos pontos de quebra de todas as UFs, em centavos (início de cada faixa e
+    o centavo seguinte a cada ``ate``), divide o eixo em segmentos em que o
+    ranking não muda; para cada segmento guardamos a ordem completa das UFs e a mais
+    barata. ``ranking``/``melhor`` viram uma única busca binária.
+
+    Empates seguem a ordem de ``ufs``; UFs sem faixa para o valor ficam de fora.
+    """
+
+    __slots__ = ("ufs", "pontos", "_valores", "_ordem", "_n", "_min_uf")
+
+    def __init__(self, indices: Mapping[str, BracketIndex], ufs: Sequence[str]):
+        self.ufs = tuple(uf for uf in ufs if uf in indices)
+        k = len(self.ufs)
+
+        # ponto (centavos) -> [(prioridade, posição da UF, emolumento em centavos ou -1)]
+        eventos: Dict[int, List[Tuple[int, int, int]]] = {}
+        for u, uf in enumerate(self.ufs):
+            idx = indices[uf]
+            last = len(idx) - 1
+            for i in range(len(idx)):
+                # logo após o "ate": sem faixa (ou última faixa, acima do teto)
+                emo_fim = idx.emolumento_centavos[last] if i == last else -1
+                eventos.setdefault(idx.ate_centavos[i] + 1, []).append((0, u, emo_fim))
+                eventos.setdefault(idx.de_centavos[i], []).append((1, u, idx.emolumento_centavos[i]))
+
+        atual = [-1] * k
+        ranking: List[Tuple[int, int]] = []  # (emolumento, posição) ordenado
+        pontos = array("q")
+        valores = array("q")
+        ordem = bytearray()
+        n_presentes = array("B")
+        min_uf = array("b")
+        for p in sorted(eventos):
+            # varredura: só as UFs com evento neste ponto mudam de lugar
+            for _, u, emo in sorted(eventos[p]):
+                if atual[u] >= 0:
+                    ranking.remove((atual[u], u))
+                atual[u] = emo
+            for u in {u for _, u, _ in eventos[p]}:
+                if atual[u] >= 0:
+                    insort(ranking, (atual[u], u))
+            pontos.append(p)
+            valores.extend(atual)
+            ordem.extend(u for _, u in ranking)
+            ordem.extend(bytes(k - len(ranking)))
+            n_presentes.append(len(ranking))
+            min_uf.append(ranking[0][1] if ranking else -1)
+
+        self.pontos = pontos
+        self._valores = valores
+        self._ordem = bytes(ordem)
+        self._n = n_presentes
+        self._min_uf = min_uf
+
+    def __len__(self) -> int:
+        return len(self.pontos)
+
+    def _segmento(self, valor: Optional[float]) -> int:
+        if valor is None:
+            return -1
+        valor = float(valor)
+        if not valor >= 0:
+            return -1
+        return bisect_right(self.pontos, centavos(valor)) - 1
+
+    def ranking(self, valor: float) -> List[Tuple[str, float]]:
+        """[(UF, emolumento)] do mais barato para o mais caro."""
+        j = self._segmento(valor)
+        if j < 0:
+            return []
+        k = len(self.ufs)
+        base = j * k
+        ufs, valores = self.ufs, self._valores
+        return [(ufs[u], valores[base + u] / 100) for u in self._ordem[base: base + self._n[j]]]
+
+    def melhor(self, valor: float) -> Optional[Tuple[str, float]]:
+        """(UF, emolumento) mais barato para o valor, ou None."""
+        j = self._segmento(valor)
+        if j < 0 or self._min_uf[j] < 0:
+            return None
+        u = self._min_uf[j]
+        return self.ufs[u], reais(self._valores[j * len(self.ufs) + u])
+
+
+def _sha256_arquivo(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _ler_cache_compilado(cache_path: str, xlsx_path: str, fonte: str) -> Optional[TabelasEscrituraV5]:
+    """Carrega o cache compilado via mmap se ele corresponder à planilha atual.
+
+    O sha256 da planilha sempre é conferido com o do header: mtime/tamanho
+    iguais não bastam (uma planilha diferente copiada com ``cp -p`` e
+    renomeada por cima tem os mesmos). Retorna None quando o cache está
+    ausente, inválido ou obsoleto.
+    """
+    if sys.byteorder != "little":
+        return None
+    try:
+        with open(cache_path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        st = os.stat(xlsx_path)
+    except (OSError, ValueError):
+        return None
+
+    if len(mm) < _CACHE_HEADER.size:
+        return None
+    magic, version, _, digest, _mtime_ns, size, n_ufs = _CACHE_HEADER.unpack_from(mm, 0)
+    if magic != _CACHE_MAGIC or version != _CACHE_VERSION:
+        return None
+    sha256 = digest.hex()
+    # tamanho diferente já descarta sem ler a planilha
+    if size != st.st_size or _sha256_arquivo(xlsx_path) != sha256:
+        return None
+
+    mv = memoryview(mm)
+    indices: Dict[str, BracketIndex] = {}
+    pos = _CACHE_HEADER.size
+    for _ in range(n_ufs):
+        if pos + _CACHE_ENTRY.size > len(mm):
+            return None
+        uf_b, n, off = _CACHE_ENTRY.unpack_from(mm, pos)
+        pos += _CACHE_ENTRY.size
+        if n == 0 or off + 24 * n > len(mm):
+            return None
+        cols = [mv[off + 8 * n * k: off + 8 * n * (k + 1)].cast("q") for k in range(3)]
+        indices[uf_b.decode("ascii")] = BracketIndex(*cols)
+    if not indices:
+        return None
+    return TabelasEscrituraV5(fonte=fonte, indices=MappingProxyType(indices), sha256=sha256)
+
+
+def _gravar_cache_compilado(cache_path: str, tabelas: TabelasEscrituraV5, st: os.stat_result) -> None:
+    """Grava o cache compilado de forma atômica (arquivo temporário + rename)."""
+    if sys.byteorder != "little":
+        return
+    ufs = sorted(tabelas.indices)
+    off = _CACHE_HEADER.size + _CACHE_ENTRY.size * len(ufs)
+    parts = [_CACHE_HEADER.pack(
+        _CACHE_MAGIC, _CACHE_VERSION, 0, bytes.fromhex(tabelas.sha256), st.st_mtime_ns, st.st_size, len(ufs)
+    )]
+    dados: List[bytes] = []
+    for uf in ufs:
+        idx = tabelas.indices[uf]
+        parts.append(_CACHE_ENTRY.pack(uf.encode("ascii"), len(idx), off))
+        for col in (idx.de_centavos, idx.ate_centavos, idx.emolumento_centavos):
+            b = array("q", col).tobytes()
+            dados.append(b)
+            off += len(b)
+    parts.extend(dados)
+
+    d = os.path.dirname(os.path.abspath(cache_path))
+    try:
+        fd, tmp = tempfile.mkstemp(prefix=".v5cache-", dir=d)
+    except OSError:
+        # diretório somente leitura: segue sem cache
+        return
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"".join(parts))
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, cache_path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+class CacheTabelasV5:
+    """Cache em memória das tabelas lidas da planilha, compartilhado entre instâncias.
+
+    Cada entrada guarda a assinatura da planilha (mtime_ns, tamanho, inode) de
+    quando foi carregada; se o arquivo mudar, a entrada é descartada e recarregada
+    (o cache compilado em disco decide pelo sha256 se o XML precisa ser
+    relido). O ``stat`` de cada planilha é refeito no máximo a cada
+    ``intervalo_verificacao`` segundos. Limitado a ``maxsize`` entradas (LRU).
+    """
+
+    def __init__(self, maxsize: int = 128, intervalo_verificacao: float = 1.0):
+        self.maxsize = maxsize
+        self.intervalo_verificacao = intervalo_verificacao
+        self._dados: "OrderedDict[Hashable, Tuple[Tuple[int, int, int], object]]" = OrderedDict()
+        self._stats: Dict[str, Tuple[float, Tuple[int, int, int]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidacoes = 0
+        self.evictions = 0
+
+    def assinatura(self, xlsx_path: str) -> Tuple[int, int, int]:
+        agora = time.monotonic()
+        cached = self._stats.get(xlsx_path)
+        if cached is not None and agora - cached[0] < self.intervalo_verificacao:
+            return cached[1]
+        st = os.stat(xlsx_path)
+        # o inode pega a publicação por cópia + rename (``cp -p`` mantém mtime e tamanho)
+        sig = (st.st_mtime_ns, st.st_size, st.st_ino)
+        self._stats[xlsx_path] = (agora, sig)
+        return sig
+
+    def obter(self, xlsx_path: str, chave: Hashable, carregar: Callable[[], _T]) -> _T:
+        xlsx_path = os.path.abspath(xlsx_path)
+        sig = self.assinatura(xlsx_path)
+        k = (xlsx_path, chave)
+        with self._lock:
+            item = self._dados.get(k)
+            if item is not None:
+                if item[0] == sig:
+                    self._dados.move_to_end(k)
+                    self.hits += 1
+                    return item[1]  # type: ignore[return-value]
+                del self._dados[k]
+                self.invalidacoes += 1
+            self.misses += 1
+
+        # carrega fora do lock (parse pode ser lento)
+        valor = carregar()
+        with self._lock:
+            self._dados[k] = (sig, valor)
+            self._dados.move_to_end(k)
+            while len(self._dados) > self.maxsize:
+                self._dados.popitem(last=False)
+                self.evictions += 1
+        return valor
+
+    def invalidar(self, xlsx_path: Optional[str] = None) -> int:
+        """Descarta as entradas de uma planilha (ou todas). Retorna quantas saíram."""
+        with self._lock:
+            if xlsx_path is None:
+                keys = list(self._dados)
+                self._stats.clear()
+            else:
+                xlsx_path = os.path.abspath(xlsx_path)
+                keys = [k for k in self._dados if k[0] == xlsx_path]
+                self._stats.pop(xlsx_path, None)
+            for k in keys:
+                del self._dados[k]
+            self.invalidacoes += len(keys)
+            return len(keys)
+
+    def estatisticas(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entradas": len(self._dados),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidacoes": self.invalidacoes,
+                "evictions": self.evictions,
+            }
+
+
+# cache padrão, compartilhado por todas as instâncias de PlanilhaEmolumentosV5
+CACHE_TABELAS = CacheTabelasV5()
+
+
 class PlanilhaEmolumentosV5:
-    def __init__(self, xlsx_path: str):
+    def __init__(self, xlsx_path: str, usar_cache: Optional[bool] = None, cache_tabelas: Optional[CacheTabelasV5] = None):
         self.xlsx_path = xlsx_path
         if not os.path.exists(xlsx_path):
             raise FileNotFoundError(f"Arquivo não encontrado: {xlsx_path}")
+        if usar_cache is None:
+            usar_cache = os.environ.get("EMOLUMENTOS_V5_CACHE", "1") != "0"
+        self.usar_cache = usar_cache
+        self.cache_path = xlsx_path + _CACHE_SUFFIX
+        self.cache_tabelas = cache_tabelas if cache_tabelas is not None else CACHE_TABELAS
 
     @staticmethod
     def _cell_col(ref: str) -> str:
@@ -93,41 +635,82 @@ class PlanilhaEmolumentosV5:
         return name_to_file
 
     def _cell_value(self, c: ET.Element, shared: List[str]):
+        """Decodifica a célula pelo tipo OpenXML (atributo ``t``).
+
+        Numéricas (sem ``t`` ou ``t="n"``) já vêm como float; só strings
+        (shared/inline/fórmula) seguem como texto para a limpeza de
+        ``_to_float``.
+        """
         t = c.get("t")
+        if t == "inlineStr":
+            is_ = c.find("m:is", _NS)
+            if is_ is None:
+                return None
+            return "".join(x.text or "" for x in is_.iter(_TEXT_TAG))
         v = c.find("m:v", _NS)
         if v is None or v.text is None:
             return None
         val = v.text
+        if t is None or t == "n":
+            try:
+                return float(val)
+            except ValueError:
+                return val
         if t == "s":
             try:
                 return shared[int(val)]
             except Exception:
                 return None
+        if t == "e":
+            # erro de fórmula (#N/D, #VALOR!...)
+            return None
         return val
 
-    def _iter_rows(self, z: zipfile.ZipFile, sheet_xml_path: str, shared: List[str]) -> Iterable[Tuple[int, Dict[str, object]]]:
-        root = ET.fromstring(z.read(sheet_xml_path))
-        sheet_data = root.find("m:sheetData", _NS)
-        if sheet_data is None:
-            return
-        for row in sheet_data.findall("m:row", _NS):
-            r = row.get("r")
-            if not r:
-                continue
-            r_i = int(r)
-            d: Dict[str, object] = {}
-            for c in row.findall("m:c", _NS):
-                ref = c.get("r")
-                if not ref:
+    def _iter_rows(
+        self,
+        z: zipfile.ZipFile,
+        sheet_xml_path: str,
+        shared: List[str],
+        colunas: Optional[Collection[str]] = None,
+        min_row: int = 0,
+    ) -> Iterable[Tuple[int, Dict[str, object]]]:
+        """Lê a worksheet em streaming (``iterparse`` sobre o membro do ZIP).
+
+        Cada linha é liberada depois de processada, então a memória não cresce
+        com o tamanho da aba. ``colunas`` limita as células decodificadas e
+        linhas com número menor que ``min_row`` são puladas.
+        """
+        with z.open(sheet_xml_path) as fh:
+            sheet_data = None
+            for event, el in ET.iterparse(fh, events=("start", "end")):
+                if event == "start":
+                    if el.tag == _SHEET_DATA_TAG:
+                        sheet_data = el
+                    continue
+                if el.tag != _ROW_TAG:
                     continue
-                col = self._cell_col(ref)
-                val = self._cell_value(c, shared)
-                if val not in (None, ""):
-                    d[col] = val
-            if d:
-                yield r_i, d
-
-    def _find_table_header_row(self, rows: List[Tuple[int, Dict[str, object]]]) -> Optional[Tuple[int, str, str, str]]:
+                r = el.get("r")
+                d: Dict[str, object] = {}
+                if r and int(r) >= min_row:
+                    for c in el.iter(_CELL_TAG):
+                        ref = c.get("r")
+                        if not ref:
+                            continue
+                        col = self._cell_col(ref)
+                        if colunas is not None and col not in colunas:
+                            continue
+                        val = self._cell_value(c, shared)
+                        if val not in (None, ""):
+                            d[col] = val
+                # descarta a linha (e as anteriores) já processadas
+                if sheet_data is not None:
+                    sheet_data.clear()
+                else:
+                    el.clear()
+                if d:
+                    yield int(r), d
+
+    def _find_table_header_row(self, rows: Iterable[Tuple[int, Dict[str, object]]]) -> Optional[Tuple[int, str, str, str]]:
         """Procura a linha de header com 'De (R$)', 'Até (R$)', 'Emolumento (R$)'.
 
         Retorna: (row_number, col_de, col_ate, col_emolumento)
@@ -145,9 +728,45 @@ class PlanilhaEmolumentosV5:
                 return r, col_de, col_ate, col_emo
         return None
 
-    @lru_cache(maxsize=64)
+    def _extrair_faixas(self, z: zipfile.ZipFile, sheet_xml: str, shared: List[str], uf: str) -> List[FaixaEscritura]:
+        # 1ª passada (interrompida no header): acha as colunas De/Até/Emolumento
+        rows = self._iter_rows(z, sheet_xml, shared)
+        try:
+            header = self._find_table_header_row(rows)
+        finally:
+            rows.close()
+        if not header:
+            raise ValueError(f"Não encontrei cabeçalho de tabela (De/Até/Emolumento) na aba {uf}")
+
+        header_row, col_de, col_ate, col_emo = header
+        faixas: List[FaixaEscritura] = []
+
+        # 2ª passada: lê só as 3 colunas, nas linhas após o header
+        for r, d in self._iter_rows(z, sheet_xml, shared, colunas=(col_de, col_ate, col_emo), min_row=header_row + 1):
+            de = self._to_float(d.get(col_de))
+            ate = self._to_float(d.get(col_ate))
+            emo = self._to_float(d.get(col_emo))
+            if de is None and ate is None and emo is None:
+                continue
+            # para evitar capturar rodapés/textos, exige pelo menos ate+emo
+            if ate is None or emo is None:
+                continue
+            if de is None:
+                de = 0.0
+            faixas.append(FaixaEscritura(de=de, ate=ate, emolumento=emo))
+
+        if not faixas:
+            raise ValueError(f"Tabela de faixas vazia na aba {uf}")
+
+        # ordena e retorna
+        faixas.sort(key=lambda x: (x.de, x.ate))
+        return faixas
+
     def carregar_faixas_escritura(self, uf: str) -> List[FaixaEscritura]:
         uf = uf.upper().strip()
+        return self.cache_tabelas.obter(self.xlsx_path, ("faixas", uf), lambda: self._ler_faixas_escritura(uf))
+
+    def _ler_faixas_escritura(self, uf: str) -> List[FaixaEscritura]:
         with zipfile.ZipFile(self.xlsx_path) as z:
             shared = self._load_shared_strings(z)
             sheet_map = self._workbook_sheet_map(z)
@@ -155,62 +774,53 @@ class PlanilhaEmolumentosV5:
             if not sheet_xml:
                 raise KeyError(f"Aba não encontrada para UF={uf}. Abas disponíveis: {sorted(sheet_map.keys())}")
 
-            rows = list(self._iter_rows(z, sheet_xml, shared))
-            header = self._find_table_header_row(rows)
-            if not header:
-                raise ValueError(f"Não encontrei cabeçalho de tabela (De/Até/Emolumento) na aba {uf}")
+            return self._extrair_faixas(z, sheet_xml, shared, uf)
 
-            header_row, col_de, col_ate, col_emo = header
-            faixas: List[FaixaEscritura] = []
+    def carregar_todas_faixas(self) -> TabelasEscrituraV5:
+        """Lê as faixas de todas as UFs abrindo o .xlsx uma única vez.
 
-            # lê linhas após o header
-            for r, d in rows:
-                if r <= header_row:
-                    continue
-                de = self._to_float(d.get(col_de))
-                ate = self._to_float(d.get(col_ate))
-                emo = self._to_float(d.get(col_emo))
-                if de is None and ate is None and emo is None:
-                    continue
-                # para evitar capturar rodapés/textos, exige pelo menos ate+emo
-                if ate is None or emo is None:
+        Shared strings e mapa de abas são lidos uma vez só; cada aba de UF
+        (nome em ``UFS``) é percorrida uma vez. Com ``usar_cache``, usa (e
+        mantém) o cache compilado ``<planilha>.v5cache`` ao lado da planilha.
+        O resultado fica em ``cache_tabelas`` até a planilha mudar.
+        """
+        return self.cache_tabelas.obter(self.xlsx_path, ("todas",), self._ler_todas_faixas)
+
+    def _ler_todas_faixas(self) -> TabelasEscrituraV5:
+        fonte = os.path.basename(self.xlsx_path)
+        if self.usar_cache:
+            tabelas = _ler_cache_compilado(self.cache_path, self.xlsx_path, fonte)
+            if tabelas is not None:
+                return tabelas
+
+        st = os.stat(self.xlsx_path)
+        sha256 = _sha256_arquivo(self.xlsx_path)
+        by_uf: Dict[str, List[FaixaEscritura]] = {}
+        with zipfile.ZipFile(self.xlsx_path) as z:
+            shared = self._load_shared_strings(z)
+            sheet_map = self._workbook_sheet_map(z)
+            for name, sheet_xml in sheet_map.items():
+                # só abas de UF: uma aba auxiliar com 2 letras (ex.: "BR") não tem faixas
+                if name not in UFS:
                     continue
-                if de is None:
-                    de = 0.0
-                faixas.append(FaixaEscritura(de=de, ate=ate, emolumento=emo))
+                by_uf[name] = self._extrair_faixas(z, sheet_xml, shared, name)
 
-            if not faixas:
-                raise ValueError(f"Tabela de faixas vazia na aba {uf}")
+        if not by_uf:
+            raise ValueError(f"Nenhuma aba de UF encontrada em {self.xlsx_path}")
+        tabelas = TabelasEscrituraV5.from_faixas(fonte, by_uf, sha256=sha256)
+        if self.usar_cache:
+            _gravar_cache_compilado(self.cache_path, tabelas, st)
+        return tabelas
 
-            # ordena e retorna
-            faixas.sort(key=lambda x: (x.de, x.ate))
-            return faixas
+    def indice_escritura(self, uf: str) -> BracketIndex:
+        """Índice compilado (busca binária) das faixas de escritura da UF."""
+        uf = uf.upper().strip()
+        return self.cache_tabelas.obter(
+            self.xlsx_path, ("indice", uf), lambda: BracketIndex.from_faixas(self.carregar_faixas_escritura(uf))
+        )
 
     def calcular_escritura_por_valor(self, uf: str, valor: float) -> Dict[str, object]:
         uf = uf.upper().strip()
-        if valor is None or float(valor) < 0:
+        if valor is None or not float(valor) >= 0:
             return {"erro": "Valor inválido"}
-        valor = float(valor)
-
-        faixas = self.carregar_faixas_escritura(uf)
-        for f in faixas:
-            if f.de <= valor <= f.ate:
-                return {
-                    "uf": uf,
-                    "valor": valor,
-                    "emolumento": round(f.emolumento, 2),
-                    "faixa": {"de": f.de, "ate": f.ate},
-                    "fonte": os.path.basename(self.xlsx_path),
-                }
-        # se não achou, tenta última faixa (ex.: Até 999999999)
-        last = faixas[-1]
-        if valor > last.ate:
-            return {
-                "uf": uf,
-                "valor": valor,
-                "emolumento": round(last.emolumento, 2),
-                "faixa": {"de": last.de, "ate": last.ate},
-                "fonte": os.path.basename(self.xlsx_path),
-                "observacao": "Valor acima do teto da planilha; usando última faixa.",
-            }
-        return {"erro": "Nenhuma faixa encontrada para o valor informado"}
+        return _resultado_escritura(self.indice_escritura(uf), uf, float(valor), os.path.basename(self.xlsx_path))
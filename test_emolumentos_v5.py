@@ -0,0 +1,159 @@
+"""Testes do leitor da planilha v5 (emolumentos_v5) e da calculadora.
+
+Rodar na raiz do repositório:
+    python -m pytest -q test_emolumentos_v5.py
+"""
+
+import math
+import os
+import random
+import sys
+import zipfile
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, RAIZ)
+
+import calculadora_emolumentos_v5  # noqa: E402
+from calculadora_emolumentos_v5 import CalculadoraEmolumentosV5  # noqa: E402
+from emolumentos_v5 import UFS, FaixaEscritura, PlanilhaEmolumentosV5, TabelasEscrituraV5  # noqa: E402
+
+ORIGINAL = os.path.join(RAIZ, "legacy", "data", "Pratico_Emolumentos_v5.xlsx")
+
+
+@pytest.fixture(scope="module")
+def calc():
+    return CalculadoraEmolumentosV5(ORIGINAL)
+
+
+def _sintetica() -> TabelasEscrituraV5:
+    """Tabelas pequenas com o que a planilha real quase não tem: buraco entre
+    faixas, UF começando acima de zero, emolumento zero, empates e teto baixo."""
+    f = FaixaEscritura
+    return TabelasEscrituraV5.from_faixas("sintetica", {
+        "AC": [f(0, 1000, 10), f(1000.01, 5000, 50), f(5000.01, 10000, 80)],
+        "AL": [f(0, 1000, 10), f(2000, 8000, 30)],
+        "AM": [f(500, 3000, 0), f(3000.01, 20000, 80)],
+        "DF": [f(0, 4000, 50), f(4000.01, 6000, 30)],
+        "SP": [f(0, 999999999, 40)],
+    })
+
+
+def _calc_sintetica() -> CalculadoraEmolumentosV5:
+    c = CalculadoraEmolumentosV5(ORIGINAL)
+    c.tabelas = _sintetica()
+    return c
+
+
+def _valores_de_teste(calc, n_aleatorios=2000):
+    """Bordas de todas as faixas (e o centavo de cada lado), aleatórios e inválidos."""
+    valores = {0.0, 0.01, 1e12, 1e17}
+    for uf in calc.tabelas.ufs:
+        idx = calc.tabelas.indice(uf)
+        for c in (*idx.de_centavos, *idx.ate_centavos):
+            valores.update(((c - 1) / 100, c / 100, (c + 1) / 100))
+    rnd = random.Random(5)
+    valores.update(rnd.randint(0, 500_000_000) / 100 for _ in range(n_aleatorios))
+    valores.update(rnd.uniform(0, 5_000_000) for _ in range(n_aleatorios))
+    return sorted(v for v in valores if v >= 0) + [-0.01, -1000.0, math.nan, math.inf]
+
+
+def _mesmo(a, b):
+    return (math.isnan(a) and math.isnan(b)) or a == b
+
+
+def test_aba_auxiliar_com_duas_letras_e_ignorada(tmp_path):
+    # a aba de dashboard renomeada para "BR" tem nome de 2 letras mas não tem faixas
+    destino = str(tmp_path / "br.xlsx")
+    with zipfile.ZipFile(ORIGINAL) as zi, zipfile.ZipFile(destino, "w", zipfile.ZIP_DEFLATED) as zo:
+        for info in zi.infolist():
+            dados = zi.read(info.filename)
+            if info.filename == "xl/workbook.xml":
+                dados = dados.replace("🏠 DASHBOARD".encode(), b"BR")
+            zo.writestr(info, dados)
+
+    tabelas = PlanilhaEmolumentosV5(destino, usar_cache=False).carregar_todas_faixas()
+    assert "BR" not in tabelas
+    assert tabelas.ufs == sorted(UFS)
+    tabelas.validar()
+
+
+def _lote_referencia(calc, ufs, valores):
+    out = []
+    for uf, v in zip(ufs, valores):
+        r = calc.calcular_escritura_valor(uf, v)
+        out.append(r["emolumento"] if "emolumento" in r else math.nan)
+    return out
+
+
+@pytest.mark.parametrize("com_numpy", [True, False])
+@pytest.mark.parametrize("planilha", ["real", "sintetica"])
+def test_calcular_lote_igual_a_calcular_escritura_valor(calc, monkeypatch, com_numpy, planilha):
+    if com_numpy and calculadora_emolumentos_v5.np is None:
+        pytest.skip("NumPy não instalado")
+    if not com_numpy:
+        monkeypatch.setattr(calculadora_emolumentos_v5, "np", None)
+    # instância nova: os arrays do lote são montados para o modo em teste
+    c = CalculadoraEmolumentosV5(ORIGINAL) if planilha == "real" else _calc_sintetica()
+    valores = _valores_de_teste(c, 500)
+    rnd = random.Random(6)
+    ufs = [rnd.choice(c.tabelas.ufs) for _ in valores]
+
+    esperado = _lote_referencia(c, ufs, valores)
+    obtido = [float(x) for x in c.calcular_lote(ufs, valores)]
+    assert [i for i, (a, b) in enumerate(zip(obtido, esperado)) if not _mesmo(a, b)] == []
+    # UF única aplicada a todos os valores, com espaço e minúsculas
+    esperado_uf = _lote_referencia(c, ["AC"] * len(valores), valores)
+    obtido_uf = [float(x) for x in c.calcular_lote(" ac", valores)]
+    assert [i for i, (a, b) in enumerate(zip(obtido_uf, esperado_uf)) if not _mesmo(a, b)] == []
+
+    with pytest.raises(ValueError):
+        c.calcular_lote(["SP", "RJ"], [1.0])
+
+
+def _ranking_referencia(tabelas, valor):
+    """ranking_por_valor original: varre as faixas de cada UF e ordena (sort estável)."""
+    out = []
+    if not valor >= 0:
+        return out
+    for uf in UFS:
+        if uf not in tabelas:
+            continue
+        faixas = tabelas.faixas[uf]
+        achou = next((f for f in faixas if f.de <= valor <= f.ate), None)
+        if achou is None and valor > faixas[-1].ate:
+            achou = faixas[-1]
+        if achou is not None:
+            out.append((uf, achou.emolumento))
+    out.sort(key=lambda x: x[1])
+    return out
+
+
+@pytest.mark.parametrize("planilha", ["real", "sintetica"])
+def test_ranking_igual_a_varredura_original(calc, planilha):
+    c = calc if planilha == "real" else _calc_sintetica()
+    # só valores em centavos inteiros: entre dois centavos a varredura original
+    # comparava floats crus e o envelope arredonda ao centavo
+    valores = [v for v in _valores_de_teste(c, 1000) if not v >= 0 or math.isinf(v) or round(v * 100) == v * 100]
+    if len(valores) > 2500:
+        # a referência é linear no total de faixas: amostra fixa das bordas da planilha real
+        valores = random.Random(7).sample(valores[:-4], 2500) + valores[-4:]
+    for v in valores:
+        esperado = _ranking_referencia(c.tabelas, v)
+        assert c.ranking_por_valor(v) == esperado, v
+        assert c.melhor_uf(v) == (esperado[0] if esperado else None), v
+
+
+def test_ranking_empates_buracos_e_teto():
+    c = _calc_sintetica()
+    # AM começa em 500 com emolumento zero; empate AC/AL segue a ordem de UFS
+    assert c.ranking_por_valor(500) == [("AM", 0.0), ("AC", 10.0), ("AL", 10.0), ("SP", 40.0), ("DF", 50.0)]
+    assert c.ranking_por_valor(100) == [("AC", 10.0), ("AL", 10.0), ("SP", 40.0), ("DF", 50.0)]
+    # AL não tem faixa entre 1000,01 e 1999,99
+    assert c.ranking_por_valor(1500) == [("AM", 0.0), ("SP", 40.0), ("AC", 50.0), ("DF", 50.0)]
+    # acima do teto (AL 8000, DF 6000, AC 10000) vale a última faixa
+    assert c.ranking_por_valor(9000) == [("AL", 30.0), ("DF", 30.0), ("SP", 40.0), ("AC", 80.0), ("AM", 80.0)]
+    assert c.ranking_por_valor(10000.01) == [("AL", 30.0), ("DF", 30.0), ("SP", 40.0), ("AC", 80.0), ("AM", 80.0)]
+    assert c.melhor_uf(9000) == ("AL", 30.0)
+    assert c.ranking_por_valor(-1) == [] and c.melhor_uf(math.nan) is None
@@ -0,0 +1,123 @@
+"""Testes da recarga a quente da planilha (api_server) e do cache compilado.
+
+Rodar na raiz do repositório:
+    python -m pytest -q test_recarga_planilha.py
+"""
+
+import importlib
+import json
+import os
+import sys
+import zipfile
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, RAIZ)
+
+from calculadora_emolumentos_v5 import CalculadoraEmolumentosV5  # noqa: E402
+from emolumentos_v5 import CACHE_TABELAS, CacheTabelasV5, PlanilhaEmolumentosV5  # noqa: E402
+
+ORIGINAL = os.path.join(RAIZ, "legacy", "data", "Pratico_Emolumentos_v5.xlsx")
+SP_ANTES, SP_DEPOIS = 6942.82, 9942.82
+
+
+def _planilha(destino: str, troca=None) -> None:
+    """Regrava a planilha sem compressão: trocar dígitos por outros mantém o tamanho."""
+    with zipfile.ZipFile(ORIGINAL) as zi, zipfile.ZipFile(destino, "w", zipfile.ZIP_STORED) as zo:
+        for info in zi.infolist():
+            dados = zi.read(info.filename)
+            if troca:
+                dados = dados.replace(*troca)
+            zo.writestr(zipfile.ZipInfo(info.filename, info.date_time), dados)
+
+
+def _publicar_mesmo_stat(atual: str, nova: str) -> None:
+    """Como ``cp -p`` + rename: mesmo tamanho e mtime, inode novo."""
+    st = os.stat(atual)
+    assert os.path.getsize(nova) == st.st_size
+    os.utime(nova, ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(nova, atual)
+
+
+@pytest.fixture
+def planilhas(tmp_path, monkeypatch):
+    # refaz o stat a cada consulta em vez de esperar intervalo_verificacao
+    monkeypatch.setattr(CACHE_TABELAS, "intervalo_verificacao", 0.0)
+    atual, nova = str(tmp_path / "plan.xlsx"), str(tmp_path / "nova.xlsx")
+    _planilha(atual)
+    _planilha(nova, (b"6942.82", b"9942.82"))
+    yield atual, nova
+    CACHE_TABELAS.invalidar(atual)
+
+
+def _sp(c: CalculadoraEmolumentosV5) -> float:
+    return c.calcular_escritura_valor("SP", 500000)["emolumento"]
+
+
+def test_cache_compilado_nao_confia_so_em_mtime_e_tamanho(planilhas):
+    atual, nova = planilhas
+    assert _sp(CalculadoraEmolumentosV5(atual)) == SP_ANTES
+    assert os.path.exists(atual + ".v5cache")
+
+    _publicar_mesmo_stat(atual, nova)
+    # cache em memória novo: quem decide é o .v5cache em disco
+    tabelas = PlanilhaEmolumentosV5(atual, cache_tabelas=CacheTabelasV5()).carregar_todas_faixas()
+    assert tabelas.calcular_escritura_por_valor("SP", 500000)["emolumento"] == SP_DEPOIS
+
+
+def test_recarregar_se_alterada_percebe_copia_com_mesmo_stat(planilhas):
+    atual, nova = planilhas
+    c = CalculadoraEmolumentosV5(atual)
+    assert c.recarregar_se_alterada() is False
+
+    _publicar_mesmo_stat(atual, nova)
+    assert c.recarregar_se_alterada() is True
+    assert _sp(c) == SP_DEPOIS
+    assert c.recarregar_se_alterada() is False
+
+
+@pytest.fixture
+def servidor(planilhas, monkeypatch):
+    atual, _ = planilhas
+    monkeypatch.setenv("EMOLUMENTOS_XLSX", atual)
+    monkeypatch.setenv("EMOLUMENTOS_RELOAD_INTERVAL", "0")
+    import api_server
+
+    return importlib.reload(api_server)
+
+
+def _escritura_sp(srv) -> float:
+    r = srv.despachar("GET", "/escritura?uf=SP&valor=500000")
+    assert r.status == 200
+    return json.loads(r.corpo)["emolumento"]
+
+
+def test_recarga_troca_planilha_com_mesmo_tamanho_e_mtime(servidor, planilhas):
+    atual, nova = planilhas
+    assert _escritura_sp(servidor) == SP_ANTES
+    assert servidor.recarregar_planilha() is False
+
+    _publicar_mesmo_stat(atual, nova)
+    assert servidor.recarregar_planilha() is True
+    assert _escritura_sp(servidor) == SP_DEPOIS
+    # a assinatura nova ficou registrada: nada mais a recarregar
+    assert servidor.recarregar_planilha() is False
+
+
+def test_recarga_ignora_planilha_invalida(servidor, planilhas):
+    atual, _ = planilhas
+    antes = servidor.calc
+    with open(atual, "rb") as f:
+        dados = f.read()
+    with open(atual + ".tmp", "wb") as f:
+        f.write(dados[: len(dados) // 3])
+    os.replace(atual + ".tmp", atual)
+
+    assert servidor.recarregar_planilha() is False
+    assert servidor.calc is antes
+    assert servidor._Recargas.falhas == 1
+    assert _escritura_sp(servidor) == SP_ANTES
+    # o mesmo arquivo ruim não é relido a cada verificação
+    assert servidor.recarregar_planilha() is False
+    assert servidor._Recargas.falhas == 1